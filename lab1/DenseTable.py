@@ -0,0 +1,227 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+# Compiled automaton file: header, JSON symbol -> column map and state-name table,
+# zero padding to a multiple of 8, the little-endian int32 transition matrix (one
+# row per state, the dead state last) and a bitmap of final states.
+FILE_MAGIC = b'LFADFA\x00\x00'
+FILE_VERSION = 2
+FILE_HEADER = struct.Struct('<8s8I')
+# Byte of the final-state bitmap -> its eight bits as 0/1 bytes, lowest bit first.
+BITMAP_BYTES = [bytes(byte >> bit & 1 for bit in range(8)) for byte in range(256)]
+
+
+class DenseTable:
+    # Dense int32 transition table of a DFA, shared by lab1's CompiledStateMachine
+    # and lab2's CompiledAutomaton. States and symbols are interned to small
+    # integers; symbols that behave alike may share a column. Row `dead` absorbs
+    # every missing transition and column `unknown` is taken by characters outside
+    # the alphabet. Subclasses fill in the table, `accepting` and `initial`, and
+    # may add columns after `unknown`.
+    def __init__(self, states, symbol_index, columns, extra_columns=0):
+        self.states = sorted(states, key=str)
+        self.state_index = {state: i for i, state in enumerate(self.states)}
+        self.symbols = sorted(symbol_index)
+        self.symbol_index = symbol_index
+
+        self.dead = len(self.states)
+        self.unknown = columns
+        self.width = columns + 1 + extra_columns
+
+        self.table = array('i', [self.dead]) * ((self.dead + 1) * self.width)
+        self.accepting = bytearray(self.dead + 1)
+        self.initial = self.dead
+        self.arrays = None
+        self.path = None
+
+    def __getstate__(self):
+        # A table loaded from a file is sent to worker processes as its path, so
+        # every worker maps the same page-cached table.
+        if self.path is not None:
+            return {'path': self.path}
+        state = self.__dict__.copy()
+        state['arrays'] = None
+        return state
+
+    def __setstate__(self, state):
+        if 'table' not in state:
+            state = type(self).load(state['path']).__dict__
+        self.__dict__.update(state)
+
+    def save(self, path):
+        symbols = json.dumps(self.symbol_index).encode()
+        names = json.dumps([str(state) for state in self.states]).encode()
+        header = FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, self.dead + 1, self.width, self.unknown,
+                                  self.initial, self.dead, len(symbols), len(names))
+        table = array('i', self.table)
+        if sys.byteorder != 'little':
+            table.byteswap()
+        bitmap = bytearray((self.dead + 8) // 8)
+        for state, accepting in enumerate(self.accepting):
+            if accepting:
+                bitmap[state >> 3] |= 1 << (state & 7)
+        with open(path, 'wb') as file:
+            file.write(header + symbols + names)
+            file.write(bytes(-file.tell() % 8))
+            file.write(table)
+            file.write(bitmap)
+
+    @classmethod
+    def load(cls, path, names=False):
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, width, columns, initial, dead, symbols_size, names_size = FILE_HEADER.unpack_from(data)
+        if magic != FILE_MAGIC or version != FILE_VERSION or width <= columns:
+            raise ValueError(f'{path} is not a version {FILE_VERSION} compiled automaton')
+        offset = FILE_HEADER.size
+        symbol_index = json.loads(data[offset:offset + symbols_size])
+        offset += symbols_size
+        # State names are only decoded on request; otherwise states are row numbers.
+        states = json.loads(data[offset:offset + names_size]) if names else range(dead)
+        offset += names_size + (-(offset + names_size) % 8)
+
+        # The transition matrix stays in the mapping: nothing is copied on load.
+        table = memoryview(data)[offset:offset + rows * width * 4].cast('i')
+        if sys.byteorder != 'little':
+            table = array('i', table)
+            table.byteswap()
+        offset += rows * width * 4
+        accepting = bytearray(b''.join(BITMAP_BYTES[byte] for byte in data[offset:offset + (rows + 7) // 8])[:rows])
+
+        loaded = cls.__new__(cls)
+        loaded.states = states
+        loaded.state_index = {state: i for i, state in enumerate(states)} if names else None
+        loaded.symbols = sorted(symbol_index)
+        loaded.symbol_index = symbol_index
+        loaded.dead, loaded.unknown, loaded.width = dead, columns, width
+        loaded.table = table
+        loaded.accepting = accepting
+        loaded.initial = initial
+        loaded.arrays = None
+        loaded.path = path
+        return loaded
+
+    def run(self, text, position=None):
+        table, width, dead, unknown = self.table, self.width, self.dead, self.unknown
+        index = self.symbol_index
+        position = self.initial if position is None else position
+        for char in text:
+            position = table[position * width + index.get(char, unknown)]
+            if position == dead:
+                break
+        return position
+
+    def numpy_tables(self):
+        if self.arrays is not None:
+            return self.arrays
+        import numpy as np
+
+        table = np.frombuffer(self.table, dtype=np.int32).reshape(self.dead + 1, self.width)
+        accepting = np.frombuffer(bytes(self.accepting), dtype=np.bool_)
+        # Code point -> column lookup, sized to the largest symbol in the alphabet.
+        lookup = np.full(max((ord(s) for s in self.symbols), default=0) + 2, self.unknown, dtype=np.int32)
+        for symbol, column in self.symbol_index.items():
+            lookup[ord(symbol)] = column
+        self.arrays = table, accepting, lookup
+        return self.arrays
+
+    def byte_lookup(self, encoding='utf-8'):
+        import numpy as np
+
+        lookup = np.full(256, self.unknown, dtype=np.int32)
+        for symbol, column in self.symbol_index.items():
+            encoded = symbol.encode(encoding)
+            if len(encoded) != 1:
+                raise ValueError(f'Symbol {symbol!r} is not a single byte in {encoding}')
+            lookup[encoded[0]] = column
+        return lookup
+
+    def columns_of(self, chunk, encoding='utf-8'):
+        import numpy as np
+
+        if isinstance(chunk, str):
+            _, _, lookup = self.numpy_tables()
+            codes = np.frombuffer(chunk.encode('utf-32-le'), dtype='<u4')
+            return lookup[np.minimum(codes, len(lookup) - 1)]
+        return self.byte_lookup(encoding)[np.frombuffer(chunk, dtype=np.uint8)]
+
+    def chunk_mapping(self, chunk, encoding='utf-8'):
+        # Maps every start state to the state reached after reading `chunk`. Each
+        # character is a state -> state function (a column of the table); adjacent
+        # functions are composed pairwise until one is left, so the whole chunk is
+        # reduced with vectorized gathers instead of a per-character Python loop.
+        import numpy as np
+
+        table, _, _ = self.numpy_tables()
+        columns = self.columns_of(chunk, encoding)
+        identity = np.arange(self.dead + 1, dtype=np.int32)[:, None]
+        mapping = identity[:, 0]
+        block = max(64, (1 << 18) // (self.dead + 1))
+        for start in range(0, len(columns), block):
+            # steps[s, i] is the state reached from s after character i.
+            steps = np.ascontiguousarray(table[:, columns[start:start + block]])
+            while steps.shape[1] > 1:
+                if steps.shape[1] % 2:
+                    steps = np.concatenate([steps, identity], axis=1)
+                length = steps.shape[1]
+                steps = np.take(steps, steps[:, 0::2] * length + np.arange(1, length, 2, dtype=np.int32))
+            mapping = steps[:, 0][mapping]
+        return mapping
+
+    def compose(self, mappings):
+        position = self.initial
+        for mapping in mappings:
+            position = int(mapping[position])
+        return position
+
+    def run_parallel(self, text, processes=None, chunk_size=1 << 22):
+        # State reached after text, with its chunks mapped in worker processes.
+        processes = processes or os.cpu_count() or 1
+        chunk_size = max(1, min(chunk_size, -(-len(text) // processes)))
+        chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        if processes == 1:
+            mappings = map(self.chunk_mapping, chunks)
+        else:
+            with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(self,)) as pool:
+                mappings = list(pool.map(chunk_mapping_worker, chunks))
+        return self.compose(mappings)
+
+    def run_file_parallel(self, path, processes=None, chunk_size=1 << 24, encoding='utf-8'):
+        processes = processes or os.cpu_count() or 1
+        size = os.path.getsize(path)
+        chunk_size = max(1, min(chunk_size, -(-size // processes)))
+        jobs = [(path, offset, chunk_size, encoding) for offset in range(0, size, chunk_size)]
+        if processes == 1:
+            mappings = (file_chunk_mapping(self, *job) for job in jobs)
+        else:
+            with ProcessPoolExecutor(processes, initializer=init_worker, initargs=(self,)) as pool:
+                mappings = list(pool.map(file_chunk_mapping_worker, jobs))
+        return self.compose(mappings)
+
+
+# Process pool workers receive the compiled table once, through the initializer.
+worker_table = None
+
+
+def init_worker(table):
+    global worker_table
+    worker_table = table
+
+
+def chunk_mapping_worker(chunk):
+    return worker_table.chunk_mapping(chunk)
+
+
+def file_chunk_mapping(table, path, offset, length, encoding):
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        return table.chunk_mapping(file.read(length), encoding)
+
+
+def file_chunk_mapping_worker(job):
+    return file_chunk_mapping(worker_table, *job)
@@ -1,3 +1,11 @@
+import codecs
+import mmap
+import os
+import random
+
+from DenseTable import DenseTable
+
+
 class StateMachine:
     def __init__(self, alphabet):
         self.all_states = set()
@@ -5,25 +13,234 @@ class StateMachine:
         self.state_links = {}
         self.initial_state = None
         self.final_states = set()
+        self.compiled = None
 
     def define_initial_state(self, initial):
         self.initial_state = initial
         self.all_states.add(initial)
+        self.compiled = None
 
     def register_state(self, state_name, is_final=False):
         self.all_states.add(state_name)
         if is_final:
             self.final_states.add(state_name)
         self.state_links.setdefault(state_name, {})
+        self.compiled = None
 
     def create_link(self, source, trigger, destination):
         self.state_links.setdefault(source, {})
         self.state_links[source][trigger] = destination
+        self.compiled = None
+
+    def validate_string(self, test_string):
+        return self.compile().validate_string(test_string)
+
+    def compile(self):
+        if self.compiled is None:
+            self.compiled = CompiledStateMachine(self)
+        return self.compiled
+
+    def validate_many(self, strings):
+        return self.compile().validate_many(strings)
+
+    def save(self, path):
+        self.compile().save(path)
+
+    @staticmethod
+    def load(path, names=False):
+        return CompiledStateMachine.load(path, names)
+
+    def count(self, length):
+        return self.compile().count(length)
+
+    def sample(self, length, k, seed=None):
+        return self.compile().sample(length, k, seed)
+
+    def enumerate(self, max_length):
+        return self.compile().enumerate(max_length)
+
+    def matcher(self, encoding='utf-8'):
+        return StreamMatcher(self.compile(), encoding)
+
+    def validate_file(self, path, chunk_size=1 << 20, encoding='utf-8'):
+        return self.matcher(encoding).feed_file(path, chunk_size).is_accepting()
+
+    def validate_parallel(self, text, processes=None, chunk_size=1 << 22):
+        return self.compile().validate_parallel(text, processes, chunk_size)
+
+    def validate_file_parallel(self, path, processes=None, chunk_size=1 << 24, encoding='utf-8'):
+        return self.compile().validate_file_parallel(path, processes, chunk_size, encoding)
+
+
+class CompiledStateMachine(DenseTable):
+    # The DenseTable of a StateMachine, with one column per symbol and an extra
+    # column `pad` that leaves every state unchanged, so padded batches can be
+    # stepped in lockstep.
+    def __init__(self, machine):
+        states = set(machine.all_states) | set(machine.state_links) | set(machine.final_states)
+        for links in machine.state_links.values():
+            states.update(links.values())
+        symbols = sorted(symbol for symbol in machine.alphabet if len(symbol) == 1)
+        super().__init__(states, {symbol: i for i, symbol in enumerate(symbols)}, len(symbols), 1)
+        self.pad = self.unknown + 1
+
+        for row in range(self.dead + 1):
+            self.table[row * self.width + self.pad] = row
+        for source, links in machine.state_links.items():
+            row = self.state_index[source] * self.width
+            for trigger, destination in links.items():
+                if trigger in self.symbol_index:
+                    self.table[row + self.symbol_index[trigger]] = self.state_index[destination]
+
+        for state in machine.final_states:
+            self.accepting[self.state_index[state]] = 1
+        self.initial = self.state_index.get(machine.initial_state, self.dead)
+        self.count_table = [list(self.accepting)]
+
+    @classmethod
+    def load(cls, path, names=False):
+        machine = super().load(path, names)
+        if machine.width != machine.unknown + 2:
+            raise ValueError(f'{path} is not a compiled state machine')
+        machine.pad = machine.unknown + 1
+        machine.count_table = [list(machine.accepting)]
+        return machine
 
     def validate_string(self, test_string):
-        position = self.initial_state
-        for char in test_string:
-            if char not in self.alphabet or char not in self.state_links.get(position, {}):
+        return bool(self.accepting[self.run(test_string)])
+
+    def counts(self, length):
+        # counts(n)[s] is the number of accepted strings of length n read from
+        # state s. Rows are exact Python ints, extended on demand and kept.
+        table, width, symbols = self.table, self.width, range(len(self.symbols))
+        while len(self.count_table) <= length:
+            previous = self.count_table[-1]
+            self.count_table.append([
+                sum(previous[table[row * width + column]] for column in symbols)
+                for row in range(self.dead + 1)
+            ])
+        return self.count_table[length]
+
+    def count(self, length):
+        return self.counts(length)[self.initial]
+
+    def sample(self, length, k, seed=None):
+        # Uniform over the accepted strings of the given length: every symbol is
+        # picked with probability proportional to the completions it leaves.
+        if self.count(length) == 0:
+            raise ValueError(f'The automaton accepts no strings of length {length}')
+        rng = random.Random(seed)
+        table, width = self.table, self.width
+        strings = []
+        for _ in range(k):
+            position = self.initial
+            chars = []
+            for remaining in range(length, 0, -1):
+                pick = rng.randrange(self.counts(remaining)[position])
+                following = self.counts(remaining - 1)
+                for column, symbol in enumerate(self.symbols):
+                    target = table[position * width + column]
+                    if pick < following[target]:
+                        break
+                    pick -= following[target]
+                chars.append(symbol)
+                position = target
+            strings.append(''.join(chars))
+        return strings
+
+    def enumerate(self, max_length):
+        # Accepted strings of length <= max_length in lexicographic order. Branches
+        # that cannot reach a final state within the remaining length are pruned.
+        self.counts(max_length)
+        live = [[bool(n) for n in self.count_table[0]]]
+        for length in range(1, max_length + 1):
+            live.append([alive or bool(n) for alive, n in zip(live[-1], self.count_table[length])])
+
+        stack = [(self.initial, '', max_length)] if live[max_length][self.initial] else []
+        while stack:
+            position, prefix, remaining = stack.pop()
+            if self.accepting[position]:
+                yield prefix
+            if not remaining:
+                continue
+            for column in range(len(self.symbols) - 1, -1, -1):
+                target = self.table[position * self.width + column]
+                if live[remaining - 1][target]:
+                    stack.append((target, prefix + self.symbols[column], remaining - 1))
+
+    def encode_batch(self, strings):
+        import numpy as np
+
+        _, _, lookup = self.numpy_tables()
+        lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+        longest = int(lengths.max()) if len(strings) else 0
+        codes = np.frombuffer(''.join(strings).encode('utf-32-le'), dtype='<u4')
+        codes = lookup[np.minimum(codes, len(lookup) - 1)]
+
+        columns = np.full((len(strings), longest), self.pad, dtype=np.int32)
+        columns[np.arange(longest) < lengths[:, None]] = codes
+        return columns
+
+    def validate_many(self, strings):
+        import numpy as np
+
+        strings = list(strings)
+        table, accepting, _ = self.numpy_tables()
+        columns = self.encode_batch(strings)
+        positions = np.full(len(strings), self.initial, dtype=np.int32)
+        for step in range(columns.shape[1]):
+            positions = table[positions, columns[:, step]]
+        return accepting[positions]
+
+    def validate_parallel(self, text, processes=None, chunk_size=1 << 22):
+        return bool(self.accepting[self.run_parallel(text, processes, chunk_size)])
+
+    def validate_file_parallel(self, path, processes=None, chunk_size=1 << 24, encoding='utf-8'):
+        return bool(self.accepting[self.run_file_parallel(path, processes, chunk_size, encoding)])
+
+
+class StreamMatcher:
+    # Resumable validation: input arrives in pieces through feed() and only the
+    # current state (plus any incomplete multi-byte character) is kept between them.
+    def __init__(self, compiled, encoding='utf-8'):
+        self.compiled = compiled
+        self.encoding = encoding
+        self.reset()
+
+    def reset(self):
+        self.position = self.compiled.initial
+        self.decoder = codecs.getincrementaldecoder(self.encoding)()
+        return self
+
+    def is_dead(self):
+        return self.position == self.compiled.dead
+
+    def is_accepting(self):
+        if self.decoder.getstate()[0]:
+            return False
+        return bool(self.compiled.accepting[self.position])
+
+    def feed(self, chunk):
+        if self.is_dead():
+            return False
+        if not isinstance(chunk, str):
+            try:
+                chunk = self.decoder.decode(chunk)
+            except UnicodeDecodeError:
+                # Bytes that are not valid text reject the input, like symbols
+                # outside the alphabet do.
+                self.position = self.compiled.dead
                 return False
-            position = self.state_links[position][char]
-        return position in self.final_states
+        self.position = self.compiled.run(chunk, self.position)
+        return not self.is_dead()
+
+    def feed_file(self, path, chunk_size=1 << 20):
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return self
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for offset in range(0, len(data), chunk_size):
+                    if not self.feed(data[offset:offset + chunk_size]):
+                        break
+        return self
+
@@ -1,4 +1,6 @@
 import random
+from array import array
+from itertools import islice
 
 from StateMachine import StateMachine
 
@@ -18,6 +20,8 @@ class SymbolicGrammar:
             'D': ['d']
         }
         self.start_symbol = 'S'
+        self.automaton = None
+        self.automaton_key = None
 
     def create_string(self):
         sequence = [self.start_symbol]
@@ -30,28 +34,131 @@ class SymbolicGrammar:
                     break
         return ''.join(sequence)
 
+    def choice_tables(self):
+        # Every nonterminal maps to the tuple of its productions. When the grammar is
+        # right-linear a production is stored as (terminal prefix, options of the
+        # trailing nonterminal or None), so a derivation only follows references;
+        # otherwise productions are stored reversed, ready to be pushed on a stack.
+        non_terminals = set(self.non_terminals)
+        productions = {nt: self.rules.get(nt, []) + self.end_symbols.get(nt, []) for nt in self.non_terminals}
+        right_linear = all(
+            not non_terminals.intersection(path[:-1])
+            for paths in productions.values() for path in paths
+        )
+        if not right_linear:
+            return False, {nt: tuple(tuple(reversed(path)) for path in paths) for nt, paths in productions.items()}
+
+        tables = {nt: [] for nt in self.non_terminals}
+        for nt, paths in productions.items():
+            for path in paths:
+                if path and path[-1] in non_terminals:
+                    tables[nt].append((path[:-1], tables[path[-1]]))
+                else:
+                    tables[nt].append((path, None))
+        return True, tables
+
+    def stream_strings(self, seed=None, count=None):
+        rng = random.Random(seed).random
+        right_linear, tables = self.choice_tables()
+        if right_linear:
+            strings = self.linear_derivations(tables[self.start_symbol], rng)
+        else:
+            strings = self.stack_derivations(tables, rng)
+        return islice(strings, count)
+
+    def create_strings(self, count, seed=None):
+        return list(self.stream_strings(seed, count))
+
+    @staticmethod
+    def linear_derivations(start_options, rng):
+        while True:
+            result = ''
+            options = start_options
+            while options:
+                prefix, options = options[int(rng() * len(options))]
+                result += prefix
+            yield result
+
+    def stack_derivations(self, tables, rng):
+        while True:
+            stack = [self.start_symbol]
+            result = []
+            while stack:
+                sym = stack.pop()
+                options = tables.get(sym)
+                if options is None:
+                    result.append(sym)
+                else:
+                    stack.extend(options[int(rng() * len(options))])
+            yield ''.join(result)
+
+    def cached_automaton(self):
+        # convert_to_automaton(), kept until the grammar changes, so the count rows
+        # of its compiled table are reused between calls.
+        key = repr((self.non_terminals, self.terminals, self.rules, self.end_symbols, self.start_symbol))
+        if key != self.automaton_key:
+            self.automaton = self.convert_to_automaton()
+            self.automaton_key = key
+        return self.automaton
+
+    def count(self, length):
+        return self.cached_automaton().count(length)
+
+    def sample(self, length, k, seed=None):
+        return self.cached_automaton().sample(length, k, seed)
+
+    def enumerate(self, max_length):
+        return self.cached_automaton().enumerate(max_length)
+
     def trace_string_creation(self):
-        sequence = [self.start_symbol]
-        path_trace = [self.start_symbol]
-        lower_bound, upper_bound = 3, 10
-        current_step = 0
-        while current_step < upper_bound:
-            change_made = False
-            for idx, sym in enumerate(sequence):
-                if sym in self.non_terminals:
-                    options = self.rules.get(sym, [])
-                    if current_step >= lower_bound - 1:
-                        options += self.end_symbols.get(sym, [])
-                    if options:
-                        selected_path = random.choice(options)
-                        sequence[idx:idx + 1] = selected_path
-                        path_trace.append(' -> ' + ''.join(sequence))
-                        change_made = True
-                        break
-            if not change_made:
-                break
-            current_step += 1
-        return ''.join(sequence), '\n'.join(path_trace)
+        derivation = self.trace(random.random)
+        return derivation.result, derivation.render()
+
+    def trace_many(self, k, seed=None):
+        rng = random.Random(seed).random
+        tables = self.trace_tables()
+        for _ in range(k):
+            yield self.trace(rng, tables)
+
+    def trace_tables(self):
+        # Flat list of (nonterminal, path) that derivation steps refer to by index,
+        # plus the indices of each nonterminal's rules and end symbols.
+        productions, options = [], []
+        for table in (self.rules, self.end_symbols):
+            indices = {}
+            for nt, paths in table.items():
+                for path in paths:
+                    indices.setdefault(nt, []).append(len(productions))
+                    productions.append((nt, path))
+            options.append(indices)
+        return productions, options[0], options[1]
+
+    def trace(self, rng, tables=None, lower_bound=3, upper_bound=10):
+        productions, rule_options, end_options = tables or self.trace_tables()
+        non_terminals = set(self.non_terminals)
+
+        # Leftmost derivation: `pending` holds the unexpanded tail reversed, and the
+        # number of symbols already emitted is the position of the next rewrite.
+        pending = [self.start_symbol]
+        emitted = []
+        steps = array('I')
+        while pending and len(steps) < 2 * upper_bound:
+            sym = pending.pop()
+            if sym not in non_terminals:
+                emitted.append(sym)
+                continue
+            options = rule_options.get(sym, [])
+            if len(steps) >= 2 * (lower_bound - 1):
+                options = options + end_options.get(sym, [])
+            if not options:
+                emitted.append(sym)
+                continue
+            index = options[int(rng() * len(options))]
+            steps.append(index)
+            steps.append(len(emitted))
+            pending.extend(reversed(productions[index][1]))
+        emitted.extend(reversed(pending))
+        return Derivation(productions, self.start_symbol, steps, ''.join(emitted))
 
     def convert_to_automaton(self):
         automaton = StateMachine(set(self.terminals))
@@ -68,3 +175,31 @@ class SymbolicGrammar:
                 automaton.create_link(symbol, path[0], "Finish")
         automaton.define_initial_state(self.start_symbol)
         return automaton
+
+
+class Derivation:
+    # A traced derivation stored as (production index, position) pairs; the
+    # intermediate sentential forms are only rebuilt when rendered.
+    def __init__(self, productions, start_symbol, steps, result):
+        self.productions = productions
+        self.start_symbol = start_symbol
+        self.steps = steps
+        self.result = result
+
+    def __len__(self):
+        return len(self.steps) // 2
+
+    def __iter__(self):
+        for i in range(0, len(self.steps), 2):
+            yield self.steps[i], self.steps[i + 1]
+
+    def forms(self):
+        sequence = [self.start_symbol]
+        yield self.start_symbol
+        for index, position in self:
+            sequence[position:position + 1] = self.productions[index][1]
+            yield ''.join(sequence)
+
+    def render(self):
+        forms = self.forms()
+        return '\n'.join([next(forms)] + [' -> ' + form for form in forms])
@@ -0,0 +1,39 @@
+import os
+import time
+
+from SymbolicGrammar import SymbolicGrammar
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f'{label:<40} {time.perf_counter() - start:8.3f} s  -> {result}')
+    return result
+
+
+def bench_parallel_validation(size=50_000_000):
+    automaton = SymbolicGrammar().convert_to_automaton()
+    text = 'ab' * (size // 2) + 'e'
+    print(f'Parallel validation of a {len(text):,} character string')
+    timed('validate_string (sequential)', automaton.validate_string, text)
+    for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+        timed(f'validate_parallel ({processes} processes)', automaton.validate_parallel, text, processes)
+
+
+def bench_string_generation(count=1_000_000):
+    grammar = SymbolicGrammar()
+    print(f'Generating {count:,} strings')
+    start = time.perf_counter()
+    for _ in range(count):
+        grammar.create_string()
+    baseline = time.perf_counter() - start
+    print(f'{"create_string":<40} {baseline:8.3f} s')
+    start = time.perf_counter()
+    grammar.create_strings(count, seed=1)
+    elapsed = time.perf_counter() - start
+    print(f'{"create_strings":<40} {elapsed:8.3f} s  ({baseline / elapsed:.1f}x)')
+
+
+if __name__ == '__main__':
+    bench_parallel_validation()
+    bench_string_generation()
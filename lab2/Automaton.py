@@ -0,0 +1,553 @@
+import importlib.util
+import os
+import sys
+import time
+from collections import deque
+from html import escape
+
+LAB1 = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lab1')
+
+
+def load_dense_table():
+    # The dense table, its file format and the parallel runner are shared with
+    # lab1. The module is loaded from its file, without adding lab1 to sys.path,
+    # and registered under its own name so that lab1 shares it and process pool
+    # workers find its functions.
+    module = sys.modules.get('DenseTable')
+    if module is None:
+        spec = importlib.util.spec_from_file_location('DenseTable', os.path.join(LAB1, 'DenseTable.py'))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['DenseTable'] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+DenseTable = load_dense_table().DenseTable
+
+
+class DeterminizationLimit(Exception):
+    # Raised by convert_to_dfa when a limit is hit. `partial` is the DFA built so
+    # far: every discovered state, the ones not yet expanded going to the dead
+    # state () on every symbol.
+    def __init__(self, limit, value, metrics, partial):
+        super().__init__(f'Determinization stopped: {limit} limit of {value} exceeded '
+                         f'after {metrics["states"]} states')
+        self.limit = limit
+        self.value = value
+        self.metrics = metrics
+        self.partial = partial
+
+
+class Automaton:
+    def __init__(self, states, alphabet, final_states, transitions, initial_state='q0'):
+        self.states = states
+        self.alphabet = alphabet
+        self.final_states = final_states
+        self.initial_state = initial_state
+        self.transitions = transitions
+
+    @classmethod
+    def from_classes(cls, states, alphabet, final_states, classes, class_transitions, initial_state='q0'):
+        # Transitions given per symbol class: class_transitions maps (state, c) to
+        # the target on every symbol of classes[c]. The per-symbol `transitions`
+        # dict is only built if it is read.
+        automaton = cls(states, alphabet, final_states, None, initial_state)
+        automaton.classes = classes
+        automaton.class_transitions = class_transitions
+        return automaton
+
+    @property
+    def transitions(self):
+        # A class-indexed automaton is expanded on the first read and is an
+        # ordinary one from then on, so edits to the returned dict take effect.
+        if self.class_transitions is not None:
+            self.transition_dict = {
+                (state, symbol): dst
+                for (state, column), dst in self.class_transitions.items() for symbol in self.classes[column]
+            }
+            self.classes = None
+            self.class_transitions = None
+        return self.transition_dict
+
+    @transitions.setter
+    def transitions(self, transitions):
+        self.transition_dict = transitions
+        self.classes = None
+        self.class_transitions = None
+
+    def edges(self):
+        # (src, symbols, dst) of every transition, one per class in a class table.
+        if self.class_transitions is not None:
+            for (src, column), dst in self.class_transitions.items():
+                yield src, self.classes[column], dst
+        else:
+            for (src, symbol), dst in self.transitions.items():
+                yield src, [symbol], dst
+
+    def class_targets(self, state, column, classes):
+        # Targets of state on the symbols of classes[column], where classes is the
+        # result of symbol_classes().
+        if self.class_transitions is not None:
+            return transition_targets(self.class_transitions.get((state, column), []))
+        return transition_targets(self.transition_dict.get((state, classes[column][0]), []))
+
+    def symbol_classes(self):
+        # Symbols that send every state to the same targets are interchangeable, so
+        # checks and tables only need one representative (the first) per class.
+        # They are worked out again on every call unless the automaton is
+        # class-indexed, so they always match the current transitions.
+        if self.class_transitions is not None:
+            return self.classes
+        behaviour = {symbol: [] for symbol in self.alphabet}
+        for (state, symbol), dst in self.transitions.items():
+            targets = transition_targets(dst)
+            if symbol in behaviour and targets:
+                behaviour[symbol].append((state, frozenset(targets)))
+        classes = {}
+        for symbol in sorted(behaviour, key=str):
+            classes.setdefault(frozenset(behaviour[symbol]), []).append(symbol)
+        return list(classes.values())
+
+    def is_dfa(self):
+        classes = self.symbol_classes()
+        for column in range(len(classes)):
+            for state in self.states:
+                if len(self.class_targets(state, column, classes)) != 1:
+                    return False
+        return True
+
+    def is_deterministic(self):
+        # Like is_dfa, but missing transitions (or the empty target ()) are allowed
+        # and lead to the implicit dead state, as in partial and minimized DFAs.
+        classes = self.symbol_classes()
+        for column in range(len(classes)):
+            for state in self.states:
+                if len(self.class_targets(state, column, classes)) > 1:
+                    return False
+        return True
+
+    def convert_to_dfa(self, minimize=False, report=None, progress=None, progress_every=1000,
+                       max_states=None, max_seconds=None, max_bytes=None):
+        if self.is_deterministic():
+            return self.minimize(report) if minimize else self
+
+        nfa_states, index, classes, moves, final_mask = self.subset_tables()
+        # Rough footprint of one discovered state (its mask and dictionary entry)
+        # and of one recorded transition.
+        state_bytes = 120 + len(nfa_states) // 8
+        edge_bytes = 80
+
+        start = 1 << index[self.initial_state]
+        discovered = {start: 0}
+        masks = [start]
+        edges = []
+        queue = deque([start])
+        began = time.perf_counter()
+
+        def metrics():
+            return {
+                'states': len(masks),
+                'queue': len(queue),
+                'transitions': len(edges),
+                'elapsed': time.perf_counter() - began,
+                'bytes': len(masks) * state_bytes + len(edges) * edge_bytes,
+            }
+
+        expanded = 0
+        while queue:
+            mask = queue.popleft()
+            for column, groups in enumerate(moves):
+                successor = subset_step(groups, mask)
+                if successor and successor not in discovered:
+                    discovered[successor] = len(masks)
+                    masks.append(successor)
+                    queue.append(successor)
+                edges.append((mask, column, successor))
+            expanded += 1
+
+            if max_states is not None and len(masks) > max_states:
+                limit, value = 'max_states', max_states
+            elif max_seconds is not None and time.perf_counter() - began > max_seconds:
+                limit, value = 'max_seconds', max_seconds
+            elif max_bytes is not None and len(masks) * state_bytes + len(edges) * edge_bytes > max_bytes:
+                limit, value = 'max_bytes', max_bytes
+            else:
+                limit = None
+            if limit is not None:
+                reached = metrics()
+                edges += [(mask, column, 0) for mask in queue for column in range(len(moves))]
+                partial = self.subset_automaton(nfa_states, classes, final_mask, masks, edges)
+                raise DeterminizationLimit(limit, value, reached, partial)
+            if progress is not None and expanded % progress_every == 0:
+                progress(metrics())
+
+        if progress is not None:
+            progress(metrics())
+        dfa = self.subset_automaton(nfa_states, classes, final_mask, masks, edges)
+        return dfa.minimize(report) if minimize else dfa
+
+    def subset_automaton(self, nfa_states, classes, final_mask, masks, edges):
+        def name(mask):
+            members = []
+            while mask:
+                low = mask & -mask
+                members.append(nfa_states[low.bit_length() - 1])
+                mask ^= low
+            return tuple(members)
+
+        names = {mask: name(mask) for mask in masks}
+        names[0] = ()
+        new_states = [names[mask] for mask in masks]
+        new_final_states = [names[mask] for mask in masks if mask & final_mask]
+        # Symbols equivalent in the NFA stay equivalent in its subset automaton.
+        new_transitions = {(names[mask], column): names[successor] for mask, column, successor in edges}
+        return Automaton.from_classes(new_states, self.alphabet, new_final_states, classes, new_transitions,
+                                      names[masks[0]])
+
+    def subset_tables(self):
+        # NFA state sets are integer bitmasks. moves[c][k][byte] is the union of the
+        # successors, on symbol class c, of the states selected by `byte` in the k-th
+        # group of eight, so the successor of a set costs one lookup per eight states.
+        nfa_states = [self.initial_state] + list(self.states)
+        for state, _, targets in self.edges():
+            nfa_states.append(state)
+            nfa_states.extend(transition_targets(targets))
+        nfa_states = sorted(set(nfa_states), key=str)
+        index = {state: i for i, state in enumerate(nfa_states)}
+        classes = self.symbol_classes()
+
+        moves = []
+        for column in range(len(classes)):
+            single = [0] * (-(-len(nfa_states) // 8) * 8)
+            for state in nfa_states:
+                for target in self.class_targets(state, column, classes):
+                    single[index[state]] |= 1 << index[target]
+            groups = []
+            for base in range(0, len(nfa_states), 8):
+                group = [0] * 256
+                for byte in range(1, 256):
+                    low = byte & -byte
+                    group[byte] = group[byte ^ low] | single[base + low.bit_length() - 1]
+                groups.append(group)
+            moves.append(groups)
+        final_mask = 0
+        for state in self.final_states:
+            if state in index:
+                final_mask |= 1 << index[state]
+        return nfa_states, index, classes, moves, final_mask
+
+    def minimize(self, report=None):
+        # report, when given, is called with the state counts before and after and
+        # the time taken.
+        began = time.perf_counter()
+        dfa = self.convert_to_dfa()
+        states = [dfa.initial_state] + list(dfa.states)
+        for src, _, dst in dfa.edges():
+            states.append(src)
+            states.extend(transition_targets(dst))
+        states = list(dict.fromkeys(states))
+        index = {state: i for i, state in enumerate(states)}
+        classes = dfa.symbol_classes()
+        symbols = [symbol for symbol, *_ in classes]
+
+        # Complete integer table with an explicit dead state, restricted to the
+        # states reachable from the initial one. The dead state is always kept so
+        # that trap states merge into it.
+        dead = len(states)
+        delta = [[dead] * (dead + 1) for _ in symbols]
+        for column in range(len(symbols)):
+            for state in states:
+                targets = dfa.class_targets(state, column, classes)
+                if targets:
+                    delta[column][index[state]] = index[targets[0]]
+        reachable = [index[dfa.initial_state], dead]
+        seen = set(reachable)
+        for state in reachable:
+            for row in delta:
+                if row[state] not in seen:
+                    seen.add(row[state])
+                    reachable.append(row[state])
+        inverse = [{} for _ in symbols]
+        for column, row in enumerate(delta):
+            for state in reachable:
+                inverse[column].setdefault(row[state], []).append(state)
+
+        # Hopcroft's partition refinement: split every block by the preimage of a
+        # splitter, and only enqueue the smaller half of a split block.
+        accepting = {index[state] for state in dfa.final_states if state in index}
+        blocks = [block for block in ({s for s in reachable if s in accepting},
+                                      {s for s in reachable if s not in accepting}) if block]
+        block_of = {}
+        for b, block in enumerate(blocks):
+            for state in block:
+                block_of[state] = b
+        smallest = min(range(len(blocks)), key=lambda b: len(blocks[b]))
+        pending = {(smallest, column) for column in range(len(symbols))}
+        worklist = deque(pending)
+        while worklist:
+            splitter = worklist.popleft()
+            pending.discard(splitter)
+            b, column = splitter
+            touched = {}
+            for target in blocks[b]:
+                for state in inverse[column].get(target, ()):
+                    touched.setdefault(block_of[state], set()).add(state)
+            for y, members in touched.items():
+                if len(members) == len(blocks[y]):
+                    continue
+                blocks[y] -= members
+                blocks.append(members)
+                new = len(blocks) - 1
+                for state in members:
+                    block_of[state] = new
+                for d in range(len(symbols)):
+                    if (y, d) in pending:
+                        split = (new, d)
+                    else:
+                        split = (new, d) if len(members) <= len(blocks[y]) else (y, d)
+                    if split not in pending:
+                        pending.add(split)
+                        worklist.append(split)
+
+        # Blocks are named after their first state in breadth-first order. The block
+        # of the dead state becomes the empty target (), as in convert_to_dfa,
+        # unless the initial state itself is dead.
+        names = {}
+        for state in reachable:
+            names.setdefault(block_of[state], states[state] if state != dead else ())
+        if block_of[dead] != block_of[index[dfa.initial_state]]:
+            names[block_of[dead]] = ()
+        live = [b for b in dict.fromkeys(block_of[state] for state in reachable) if names[b] != ()]
+
+        new_states = [names[b] for b in live]
+        new_final_states = [names[b] for b in live if min(blocks[b]) in accepting]
+        new_transitions = {}
+        for b in live:
+            representative = min(blocks[b])
+            for column in range(len(classes)):
+                new_transitions[(names[b], column)] = names[block_of[delta[column][representative]]]
+
+        if report is not None:
+            before, after = len(reachable) - 1, len(new_states)
+            report({
+                'before': before,
+                'after': after,
+                'entries_saved': (before - after) * len(dfa.alphabet),
+                'elapsed': time.perf_counter() - began,
+            })
+        initial = names[block_of[index[dfa.initial_state]]]
+        return Automaton.from_classes(new_states, dfa.alphabet, new_final_states, classes, new_transitions, initial)
+
+    def compile(self):
+        # A new table on every call, built from the automaton as it is now; keep
+        # the result to match many strings.
+        return CompiledAutomaton(self.convert_to_dfa())
+
+    def save(self, path):
+        self.compile().save(path)
+
+    @staticmethod
+    def load(path, names=False):
+        return CompiledAutomaton.load(path, names)
+
+    def accepts(self, string):
+        return self.compile().accepts(string)
+
+    def accepts_parallel(self, string, processes=None, chunk_size=1 << 22):
+        return self.compile().accepts_parallel(string, processes, chunk_size)
+
+    def accepts_file_parallel(self, path, processes=None, chunk_size=1 << 24, encoding='utf-8'):
+        return self.compile().accepts_file_parallel(path, processes, chunk_size, encoding)
+
+    def merged_edges(self):
+        # One edge per (src, dst) with the symbols of all its transitions joined.
+        edge_labels = {}
+        for src, symbols, dst in self.edges():
+            for target in transition_targets(dst):
+                if (src, target) in edge_labels:
+                    edge_labels[(src, target)] += ', ' + ', '.join(symbols)
+                else:
+                    edge_labels[(src, target)] = ', '.join(symbols)
+        return edge_labels
+
+    def draw(self, path=None):
+        # Plotting libraries are only needed here, so they are imported on use.
+        import networkx as nx
+        import matplotlib
+        if path is not None:
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        G = nx.DiGraph()
+
+        for state in self.states:
+            G.add_node(state, label=str(state))
+
+        edge_labels = self.merged_edges()
+        G.add_edges_from(edge_labels)
+
+        pos = nx.spring_layout(G)
+        plt.figure(figsize=(12, 8))
+
+        nx.draw_networkx_nodes(G, pos, node_size=3000, node_color='white', edgecolors='black')
+        nx.draw_networkx_edges(G, pos, arrowstyle='->', arrowsize=20)
+
+        nx.draw_networkx_labels(G, pos, labels={node: node for node in G.nodes()})
+        nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels)
+
+        for final_state in self.final_states:
+            if final_state in pos:
+                nx.draw_networkx_nodes(G, pos, nodelist=[final_state], node_shape='o', node_size=3500,
+                                       edgecolors='black', linewidths=2)
+
+        plt.axis('off')
+        if path is None:
+            plt.show()
+        else:
+            plt.savefig(path)
+            plt.close()
+
+    def node_ids(self):
+        ids = {self.initial_state: 0}
+        for state in self.states:
+            ids.setdefault(state, len(ids))
+        for src, _, dst in self.edges():
+            ids.setdefault(src, len(ids))
+            for target in transition_targets(dst):
+                ids.setdefault(target, len(ids))
+        return ids
+
+    def to_dot(self, path):
+        ids = self.node_ids()
+        final_states = set(self.final_states)
+        with open(path, 'w') as file:
+            file.write('digraph automaton {\n    rankdir=LR;\n    start [shape=point];\n')
+            for state, i in ids.items():
+                shape = 'doublecircle' if state in final_states else 'circle'
+                file.write(f'    n{i} [shape={shape}, label={dot_string(state)}];\n')
+            file.write(f'    start -> n{ids[self.initial_state]};\n')
+            for (src, dst), label in self.merged_edges().items():
+                file.write(f'    n{ids[src]} -> n{ids[dst]} [label={dot_string(label)}];\n')
+            file.write('}\n')
+
+    def to_svg(self, path, spacing=120, radius=24):
+        # Layered layout without a graph library: states are placed in columns by
+        # breadth-first distance from the initial state, in discovery order.
+        ids = self.node_ids()
+        edges = self.merged_edges()
+        successors = {}
+        for src, dst in edges:
+            successors.setdefault(src, []).append(dst)
+        layer = {self.initial_state: 0}
+        queue = deque([self.initial_state])
+        while queue:
+            state = queue.popleft()
+            for target in successors.get(state, ()):
+                if target not in layer:
+                    layer[target] = layer[state] + 1
+                    queue.append(target)
+        unreachable = max(layer.values()) + 1
+        rows, position = {}, {}
+        for state in ids:
+            column = layer.get(state, unreachable)
+            rows[column] = rows.get(column, 0) + 1
+            position[state] = (spacing * column + 2 * radius + 20, spacing * rows[column] - spacing // 2 + radius)
+        width = spacing * (unreachable + 1) + 4 * radius
+        height = spacing * max(rows.values()) + 2 * radius
+        final_states = set(self.final_states)
+
+        with open(path, 'w') as file:
+            file.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                       f'font-family="sans-serif" font-size="12">\n'
+                       '<defs><marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" '
+                       'markerHeight="8" orient="auto"><path d="M0,0 L10,5 L0,10 z"/></marker></defs>\n')
+            x, y = position[self.initial_state]
+            file.write(f'<line x1="{x - 2 * radius}" y1="{y}" x2="{x - radius}" y2="{y}" stroke="black" '
+                       'marker-end="url(#arrow)"/>\n')
+            for (src, dst), label in edges.items():
+                (x1, y1), (x2, y2) = position[src], position[dst]
+                label = escape(label)
+                if src == dst:
+                    file.write(f'<path d="M{x1 - 10},{y1 - radius} C{x1 - 30},{y1 - 3 * radius} {x1 + 30},'
+                               f'{y1 - 3 * radius} {x1 + 10},{y1 - radius}" fill="none" stroke="black" '
+                               f'marker-end="url(#arrow)"/>\n'
+                               f'<text x="{x1}" y="{y1 - 2.4 * radius:.1f}" text-anchor="middle">{label}</text>\n')
+                    continue
+                dx, dy = x2 - x1, y2 - y1
+                length = (dx * dx + dy * dy) ** 0.5
+                ux, uy = dx / length * radius, dy / length * radius
+                # Bend every edge slightly so that a -> b and b -> a do not overlap.
+                cx, cy = (x1 + x2) / 2 - uy, (y1 + y2) / 2 + ux
+                file.write(f'<path d="M{x1 + ux:.1f},{y1 + uy:.1f} Q{cx:.1f},{cy:.1f} {x2 - ux:.1f},{y2 - uy:.1f}" '
+                           f'fill="none" stroke="black" marker-end="url(#arrow)"/>\n'
+                           f'<text x="{(x1 + x2 + cx * 2) / 4:.1f}" y="{(y1 + y2 + cy * 2) / 4 - 3:.1f}" '
+                           f'text-anchor="middle">{label}</text>\n')
+            for state, (x, y) in position.items():
+                file.write(f'<circle cx="{x}" cy="{y}" r="{radius}" fill="white" stroke="black"/>\n')
+                if state in final_states:
+                    file.write(f'<circle cx="{x}" cy="{y}" r="{radius - 4}" fill="none" stroke="black"/>\n')
+                file.write(f'<text x="{x}" y="{y + 4}" text-anchor="middle">{escape(str(state))}</text>\n')
+            file.write('</svg>\n')
+
+    def __repr__(self):
+        return f'States: {self.states}\nAlphabet: {self.alphabet}\nFinal States: {self.final_states}\nTransitions: {self.transitions}'
+
+
+class CompiledAutomaton(DenseTable):
+    # The DenseTable of a DFA, with one column per symbol class.
+    def __init__(self, dfa):
+        states = set(dfa.states) | {dfa.initial_state}
+        for src, _, dst in dfa.edges():
+            states.add(src)
+            states.update(transition_targets(dst))
+        # (class number in the DFA, its single-character symbols) per column.
+        dfa_classes = dfa.symbol_classes()
+        classes = [(c, [symbol for symbol in symbols if len(symbol) == 1]) for c, symbols in enumerate(dfa_classes)]
+        classes = [(c, symbols) for c, symbols in classes if symbols]
+        symbol_index = {symbol: column for column, (_, symbols) in enumerate(classes) for symbol in symbols}
+        super().__init__(states, symbol_index, len(classes))
+
+        for src in self.states:
+            for column, (c, symbols) in enumerate(classes):
+                dst = dfa.class_targets(src, c, dfa_classes)
+                if len(dst) > 1:
+                    raise ValueError(f'Automaton is not deterministic on ({src}, {symbols[0]})')
+                if dst:
+                    self.table[self.state_index[src] * self.width + column] = self.state_index[dst[0]]
+
+        for state in dfa.final_states:
+            if state in self.state_index:
+                self.accepting[self.state_index[state]] = 1
+        self.initial = self.state_index[dfa.initial_state]
+
+    def accepts(self, string):
+        return bool(self.accepting[self.run(string)])
+
+    def accepts_parallel(self, string, processes=None, chunk_size=1 << 22):
+        return bool(self.accepting[self.run_parallel(string, processes, chunk_size)])
+
+    def accepts_file_parallel(self, path, processes=None, chunk_size=1 << 24, encoding='utf-8'):
+        return bool(self.accepting[self.run_file_parallel(path, processes, chunk_size, encoding)])
+
+
+def dot_string(value):
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def subset_step(groups, mask):
+    successor = 0
+    for group in groups:
+        if not mask:
+            break
+        successor |= group[mask & 0xFF]
+        mask >>= 8
+    return successor
+
+
+def transition_targets(dst):
+    # NFA-style transitions hold a list of targets, converted DFAs hold the target
+    # state itself; the empty subset () stands for no target at all.
+    if isinstance(dst, list):
+        return dst
+    return [] if dst == () else [dst]
+
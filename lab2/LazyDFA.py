@@ -0,0 +1,116 @@
+from collections import OrderedDict
+
+from Automaton import subset_step
+
+
+class LazyDFA:
+    # Simulates an NFA and caches the DFA states (NFA state sets) it runs into,
+    # so only the subsets the input actually visits are ever built. A cached state
+    # is a list [mask, accepting, successors, key]; `successors` holds the key of
+    # the next state per symbol and is set to None once the state is evicted.
+    # Successors are looked up by key, so an evicted state is referenced from
+    # nowhere and max_states bounds the memory actually held.
+    def __init__(self, nfa, max_states=10_000, max_bytes=None, policy='lru'):
+        if policy not in ('lru', 'flush'):
+            raise ValueError(f'Unknown eviction policy: {policy}')
+        self.nfa_states, index, classes, self.moves, self.final_mask = nfa.subset_tables()
+        self.symbol_index = {symbol: column for column, symbols in enumerate(classes) for symbol in symbols}
+        self.start_mask = 1 << index[nfa.initial_state]
+        self.policy = policy
+
+        if max_bytes is not None:
+            max_states = max_bytes // self.state_size()
+        self.max_states = max(2, max_states)
+
+        self.cache = OrderedDict()
+        self.by_mask = {}
+        self.next_key = 0
+        self.hits = self.misses = self.evictions = self.flushes = 0
+
+    def state_size(self):
+        # Rough per-state footprint: the mask, the state list, its successor list
+        # and the two dictionary entries that index it.
+        return 200 + 8 * len(self.moves) + len(self.nfa_states) // 8
+
+    def stats(self):
+        return {
+            'states': len(self.cache),
+            'max_states': self.max_states,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'flushes': self.flushes,
+        }
+
+    def admit(self, mask, keep=None):
+        state = self.by_mask.get(mask)
+        if state is not None:
+            if self.policy == 'lru':
+                self.cache.move_to_end(state[3])
+            return state
+        if len(self.cache) >= self.max_states:
+            if self.policy == 'flush':
+                self.flush()
+                if keep is not None:
+                    self.readmit(keep)
+            else:
+                _, evicted = self.cache.popitem(last=False)
+                if evicted is keep:
+                    self.cache[evicted[3]] = evicted
+                    _, evicted = self.cache.popitem(last=False)
+                self.evict(evicted)
+        state = [mask, bool(mask & self.final_mask), [None] * len(self.moves), self.next_key]
+        self.next_key += 1
+        self.cache[state[3]] = state
+        self.by_mask[mask] = state
+        return state
+
+    def readmit(self, state):
+        state[2] = [None] * len(self.moves)
+        self.cache[state[3]] = state
+        self.by_mask[state[0]] = state
+
+    def evict(self, state):
+        state[2] = None
+        del self.by_mask[state[0]]
+        self.evictions += 1
+
+    def flush(self):
+        for state in self.cache.values():
+            state[2] = None
+        self.evictions += len(self.cache)
+        self.cache.clear()
+        self.by_mask.clear()
+        self.flushes += 1
+
+    def step(self, state, column):
+        self.misses += 1
+        if state[2] is None:
+            state = self.admit(state[0])
+        target = self.admit(subset_step(self.moves[column], state[0]), keep=state)
+        if state[2] is not None:
+            state[2][column] = target[3]
+        return target
+
+    def accepts(self, string):
+        symbol_index, cache, lru = self.symbol_index, self.cache, self.policy == 'lru'
+        state = self.admit(self.start_mask)
+        hits = 0
+        for char in string:
+            column = symbol_index.get(char)
+            if column is None:
+                self.hits += hits
+                return False
+            successors = state[2]
+            target = cache.get(successors[column]) if successors is not None else None
+            if target is None:
+                state = self.step(state, column)
+            else:
+                hits += 1
+                state = target
+                if lru:
+                    cache.move_to_end(state[3])
+            if not state[0]:
+                break
+        self.hits += hits
+        return state[1]
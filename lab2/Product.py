@@ -0,0 +1,143 @@
+from collections import deque
+
+from Automaton import subset_step
+
+MODES = {
+    'intersection': lambda left, right: left and right,
+    'union': lambda left, right: left or right,
+    'difference': lambda left, right: left and not right,
+    'symmetric_difference': lambda left, right: left != right,
+}
+
+
+class Operand:
+    # One side of a product. A nondeterministic lab2 Automaton is determinized on
+    # the fly, its states being NFA state bitmasks as in LazyDFA. Anything else
+    # with a compile() method (a DFA, a lab1 StateMachine) or an already compiled
+    # table is stepped through its transition table. Symbols outside the
+    # operand's alphabet have column None and lead to `dead`.
+    def __init__(self, machine):
+        if hasattr(machine, 'subset_tables') and not machine.is_deterministic():
+            _, index, classes, self.moves, self.final_mask = machine.subset_tables()
+            self.columns = {symbol: column for column, symbols in enumerate(classes) for symbol in symbols}
+            self.start = 1 << index[machine.initial_state]
+            self.dead = 0
+            self.table = None
+        else:
+            compiled = machine.compile() if hasattr(machine, 'compile') else machine
+            self.columns = dict(compiled.symbol_index)
+            self.start = compiled.initial
+            self.dead = compiled.dead
+            self.table, self.width, self.accepting = compiled.table, compiled.width, compiled.accepting
+
+    def step(self, state, column):
+        if column is None:
+            return self.dead
+        if self.table is None:
+            return subset_step(self.moves[column], state)
+        return self.table[state * self.width + column]
+
+    def is_accepting(self, state):
+        if self.table is None:
+            return bool(state & self.final_mask)
+        return bool(self.accepting[state])
+
+
+class ProductAutomaton:
+    # Pair states (left, right) are only built while they are reached, so
+    # emptiness and equivalence checks stop at the first witness instead of
+    # building the cross product. Symbols that behave alike on both sides share
+    # a column, the first (smallest) of them standing for the whole class.
+    def __init__(self, left, right, mode='intersection'):
+        if mode not in MODES:
+            raise ValueError(f'Unknown product mode: {mode}')
+        self.left = left if isinstance(left, Operand) else Operand(left)
+        self.right = right if isinstance(right, Operand) else Operand(right)
+        self.mode = mode
+        self.accept = MODES[mode]
+
+        classes = {}
+        for symbol in sorted(set(self.left.columns) | set(self.right.columns)):
+            key = (self.left.columns.get(symbol), self.right.columns.get(symbol))
+            classes.setdefault(key, []).append(symbol)
+        self.pairs = list(classes)
+        self.classes = list(classes.values())
+        self.symbol_index = {symbol: column for column, symbols in enumerate(self.classes) for symbol in symbols}
+        self.start = (self.left.start, self.right.start)
+
+        # A dead side never accepts again; a pair is hopeless when no future
+        # acceptance of the other side can make the product accept.
+        self.hopeless = {}
+        for left_dead in (False, True):
+            for right_dead in (False, True):
+                lefts = (False,) if left_dead else (False, True)
+                rights = (False,) if right_dead else (False, True)
+                self.hopeless[(left_dead, right_dead)] = not any(
+                    self.accept(a, b) for a in lefts for b in rights)
+
+    def step(self, pair, column):
+        left_column, right_column = self.pairs[column]
+        return self.left.step(pair[0], left_column), self.right.step(pair[1], right_column)
+
+    def is_accepting(self, pair):
+        return self.accept(self.left.is_accepting(pair[0]), self.right.is_accepting(pair[1]))
+
+    def is_hopeless(self, pair):
+        return self.hopeless[(pair[0] == self.left.dead, pair[1] == self.right.dead)]
+
+    def accepts(self, string):
+        pair = self.start
+        for char in string:
+            column = self.symbol_index.get(char)
+            pair = (self.left.dead, self.right.dead) if column is None else self.step(pair, column)
+        return self.is_accepting(pair)
+
+    def shortest_string(self, max_states=None):
+        # Breadth-first search over the reachable pairs with columns taken in
+        # symbol order, so the first accepting pair gives the shortest accepted
+        # string, and the smallest one among those of that length.
+        parents = {self.start: None}
+        queue = deque([self.start])
+        while queue:
+            pair = queue.popleft()
+            if self.is_accepting(pair):
+                string = []
+                while parents[pair] is not None:
+                    pair, column = parents[pair]
+                    string.append(self.classes[column][0])
+                return ''.join(reversed(string))
+            if self.is_hopeless(pair):
+                continue
+            for column in range(len(self.pairs)):
+                successor = self.step(pair, column)
+                if successor not in parents:
+                    parents[successor] = (pair, column)
+                    queue.append(successor)
+            if max_states is not None and len(parents) > max_states:
+                raise ValueError(f'Product exceeded {max_states} states')
+        return None
+
+    def is_empty(self):
+        return self.shortest_string() is None
+
+
+def intersection(left, right):
+    return ProductAutomaton(left, right, 'intersection')
+
+
+def union(left, right):
+    return ProductAutomaton(left, right, 'union')
+
+
+def difference(left, right):
+    return ProductAutomaton(left, right, 'difference')
+
+
+def counterexample(left, right):
+    # Shortest string accepted by exactly one of the two automata, or None when
+    # they accept the same language.
+    return ProductAutomaton(left, right, 'symmetric_difference').shortest_string()
+
+
+def equivalent(left, right):
+    return counterexample(left, right) is None
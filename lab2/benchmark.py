@@ -0,0 +1,184 @@
+import os
+import random
+from string import ascii_letters, printable
+import tempfile
+import time
+
+from Automaton import Automaton, DeterminizationLimit
+from LazyDFA import LazyDFA
+from Product import counterexample, intersection
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f'{label:<40} {time.perf_counter() - start:8.3f} s  -> {result}')
+    return result
+
+
+def example_automaton():
+    return Automaton({'q0', 'q1', 'q2', 'q3'}, {'a', 'b'}, {'q3'}, {
+        ('q0', 'a'): ['q1', 'q2'],
+        ('q1', 'b'): ['q1'],
+        ('q1', 'a'): ['q2'],
+        ('q2', 'a'): ['q1'],
+        ('q2', 'b'): ['q3'],
+    })
+
+
+def bench_parallel_matching(size=50_000_000):
+    dfa = example_automaton().compile()
+    string = 'a' + 'b' * size + 'ab'
+    print(f'Parallel matching of a {len(string):,} character string')
+    timed('accepts (sequential)', dfa.accepts, string)
+    for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+        timed(f'accepts_parallel ({processes} processes)', dfa.accepts_parallel, string, processes)
+
+
+def random_nfa(parts, size, seed=0, accepting_parts=None):
+    # Start state that branches into `parts` random DFAs of `size` states each;
+    # the subset construction explores their reachable product. Parts past
+    # `accepting_parts` have no final states, so they only add equivalent states.
+    states, final_states, transitions = {'q0'}, set(), {}
+    for part in range(parts):
+        rng = random.Random(seed * parts + part)
+        names = [f'p{part}_{i}' for i in range(size)]
+        states.update(names)
+        if accepting_parts is None or part < accepting_parts:
+            final_states.update(rng.sample(names, size // 2))
+        for state in names:
+            for symbol in 'ab':
+                transitions[(state, symbol)] = [rng.choice(names)]
+        for symbol in 'ab':
+            transitions.setdefault(('q0', symbol), []).append(rng.choice(names))
+    return Automaton(states, {'a', 'b'}, final_states, transitions)
+
+
+def nth_from_last_nfa(n):
+    # (a|b)*a(a|b)^n: n + 2 NFA states whose DFA needs 2^(n + 1) states.
+    transitions = {('q0', 'a'): ['q0', 'q1'], ('q0', 'b'): ['q0']}
+    for i in range(1, n + 1):
+        transitions[(f'q{i}', 'a')] = [f'q{i + 1}']
+        transitions[(f'q{i}', 'b')] = [f'q{i + 1}']
+    return Automaton({f'q{i}' for i in range(n + 2)}, {'a', 'b'}, {f'q{n + 1}'}, transitions)
+
+
+def wide_nth_from_last_nfa(n, alphabet):
+    # nth_from_last_nfa where every symbol of `alphabet` other than 'a' acts like 'b'.
+    nfa = nth_from_last_nfa(n)
+    transitions = {}
+    for (state, symbol), targets in nfa.transitions.items():
+        for other in (alphabet - {'a'} if symbol == 'b' else {symbol}):
+            transitions[(state, other)] = targets
+    return Automaton(nfa.states, set(alphabet), nfa.final_states, transitions)
+
+
+def bench_determinization():
+    print('Subset construction')
+    cases = [(f'random NFA, {parts}x{size} states', random_nfa(parts, size)) for parts, size in
+             ((2, 100), (2, 200), (2, 400), (3, 60), (3, 100))]
+    cases += [(f'nth-from-last, n={n}', nth_from_last_nfa(n)) for n in (8, 12, 14, 16)]
+    for label, nfa in cases:
+        start = time.perf_counter()
+        dfa = nfa.convert_to_dfa()
+        print(f'{label:<32} {len(dfa.states):>8} DFA states {time.perf_counter() - start:8.3f} s')
+
+
+def bench_bounded_determinization(n=18):
+    print('Bounded subset construction')
+    nfa = nth_from_last_nfa(n)
+    timed(f'nth-from-last, n={n}, no limits', lambda: len(nfa.convert_to_dfa().states))
+    timed(f'nth-from-last, n={n}, progress', lambda: len(nfa.convert_to_dfa(progress=lambda metrics: None).states))
+    for limits in ({'max_states': 100_000}, {'max_seconds': 0.5}, {'max_bytes': 8 << 20}):
+        start = time.perf_counter()
+        try:
+            nfa.convert_to_dfa(**limits)
+        except DeterminizationLimit as error:
+            label = f'stopped by {error.limit}={error.value}'
+            print(f'{label:<40} {time.perf_counter() - start:8.3f} s  -> {error.metrics["states"]} states')
+
+
+def bench_minimization():
+    print('Hopcroft minimization')
+    for parts, size, accepting_parts in ((2, 200, None), (3, 60, None), (2, 400, 1), (3, 100, 1)):
+        dfa = random_nfa(parts, size, accepting_parts=accepting_parts).convert_to_dfa()
+        start = time.perf_counter()
+        minimal = dfa.minimize()
+        label = f'random NFA, {parts}x{size} states' + (f', {accepting_parts} accepting' if accepting_parts else '')
+        print(f'{label:<40} {len(dfa.states):>8} -> {len(minimal.states):<8} {time.perf_counter() - start:8.3f} s')
+
+
+def bench_lazy_dfa(length=1_000_000):
+    rng = random.Random(0)
+    string = ''.join(rng.choice('ab') for _ in range(length))
+    print(f'Lazy determinization on a {length:,} character string')
+    dfa = nth_from_last_nfa(10).compile()
+    timed('full DFA, n=10', dfa.accepts, string)
+    for n, max_states in ((10, 10_000), (24, 10_000), (24, 1_000)):
+        for policy in ('lru', 'flush'):
+            lazy = LazyDFA(nth_from_last_nfa(n), max_states=max_states, policy=policy)
+            timed(f'lazy DFA, n={n}, {max_states} states, {policy}', lazy.accepts, string)
+            print(f'{"":<40} {lazy.stats()}')
+
+
+def bench_symbol_classes(n=12):
+    print('Symbol classes over large alphabets')
+    for alphabet in ('ab', ascii_letters, printable):
+        nfa = wide_nth_from_last_nfa(n, set(alphabet))
+        start = time.perf_counter()
+        compiled = nfa.compile()
+        label = f'{len(alphabet)} symbols, {len(nfa.symbol_classes())} classes'
+        print(f'{label:<40} {time.perf_counter() - start:8.3f} s   {len(compiled.table) * 4:,} table bytes')
+
+
+def bench_product(n=16):
+    print('Lazy product automata')
+    nfa = nth_from_last_nfa(n)
+    other = nth_from_last_nfa(n)
+    other.final_states = {f'q{n}'}
+    timed(f'counterexample, nth-from-last n={n} vs n={n - 1}', counterexample, nfa, other)
+    minimal = nth_from_last_nfa(12).minimize()
+    timed('counterexample, n=12 vs its minimal DFA', counterexample, nth_from_last_nfa(12), minimal)
+    timed(f'intersection emptiness, n={n} vs n={n - 1}', lambda: intersection(nfa, other).is_empty())
+    timed(f'full DFAs, n={n} and n={n - 1}', lambda: (len(nfa.convert_to_dfa().states), len(other.convert_to_dfa().states)))
+
+
+def bench_export():
+    print('DOT / SVG export')
+    with tempfile.TemporaryDirectory() as directory:
+        for n in (10, 12, 14, 16):
+            dfa = nth_from_last_nfa(n).convert_to_dfa()
+            for extension, export in (('dot', dfa.to_dot), ('svg', dfa.to_svg)):
+                start = time.perf_counter()
+                export(os.path.join(directory, f'dfa.{extension}'))
+                label = f'{extension}, {len(dfa.states)} states'
+                print(f'{label:<40} {time.perf_counter() - start:8.3f} s')
+
+
+def bench_binary_format():
+    print('Compiled automaton files')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'dfa.bin')
+        for n in (12, 16, 18):
+            nfa = nth_from_last_nfa(n)
+            start = time.perf_counter()
+            compiled = nfa.compile()
+            built = time.perf_counter() - start
+            compiled.save(path)
+            start = time.perf_counter()
+            Automaton.load(path)
+            loaded = time.perf_counter() - start
+            label = f'{len(compiled.states)} states, {os.path.getsize(path):,} bytes'
+            print(f'{label:<40} build {built:8.3f} s   load {loaded:8.4f} s')
+
+
+if __name__ == '__main__':
+    bench_parallel_matching()
+    bench_determinization()
+    bench_bounded_determinization()
+    bench_minimization()
+    bench_lazy_dfa()
+    bench_symbol_classes()
+    bench_product()
+    bench_export()
+    bench_binary_format()
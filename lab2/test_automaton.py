@@ -0,0 +1,85 @@
+import copy
+import itertools
+import pickle
+import unittest
+
+from Automaton import Automaton, transition_targets
+from benchmark import example_automaton, nth_from_last_nfa, random_nfa
+from LazyDFA import LazyDFA
+from Product import counterexample, difference, equivalent, intersection
+
+
+def simulate(nfa, string):
+    current = {nfa.initial_state}
+    for symbol in string:
+        current = {target for state in current
+                   for target in transition_targets(nfa.transitions.get((state, symbol), []))}
+    return bool(current & set(nfa.final_states))
+
+
+def strings(alphabet, length):
+    for size in range(length + 1):
+        for string in itertools.product(sorted(alphabet), repeat=size):
+            yield ''.join(string)
+
+
+class TestAutomaton(unittest.TestCase):
+    def assertSameLanguage(self, nfa, machine, length=8):
+        for string in strings(nfa.alphabet, length):
+            self.assertEqual(machine.accepts(string), simulate(nfa, string), string)
+
+    def test_subset_construction(self):
+        nfa = nth_from_last_nfa(3)
+        dfa = nfa.convert_to_dfa()
+        self.assertTrue(dfa.is_deterministic())
+        self.assertEqual(len(dfa.states), 16)
+        self.assertSameLanguage(nfa, dfa)
+
+    def test_minimize(self):
+        nfa = random_nfa(2, 6, accepting_parts=1)
+        dfa = nfa.convert_to_dfa()
+        minimal = dfa.minimize()
+        self.assertLess(len(minimal.states), len(dfa.states))
+        self.assertSameLanguage(nfa, minimal)
+        self.assertEqual(len(nth_from_last_nfa(3).convert_to_dfa(minimize=True).states), 16)
+
+    def test_minimize_integer_states(self):
+        automaton = Automaton({0, 1}, {'a'}, {1}, {(0, 'a'): [1], (1, 'a'): [0]}, initial_state=0)
+        minimal = automaton.minimize()
+        self.assertEqual(sorted(minimal.states), [0, 1])
+        self.assertSameLanguage(automaton, minimal)
+        empty = Automaton({'', 'x'}, {'a'}, {''}, {('', 'a'): ['x'], ('x', 'a'): ['']}, initial_state='')
+        self.assertSameLanguage(empty, empty.minimize())
+
+    def test_edits_after_compile(self):
+        automaton = example_automaton()
+        self.assertTrue(automaton.accepts('ab'))
+        automaton.final_states = {'q1'}
+        self.assertTrue(automaton.accepts('a'))
+        automaton.transitions[('q1', 'a')].append('q1')
+        self.assertTrue(automaton.accepts('aa'))
+        dfa = automaton.convert_to_dfa()
+        for copied in (pickle.loads(pickle.dumps(dfa)), copy.deepcopy(dfa)):
+            self.assertSameLanguage(automaton, copied)
+
+    def test_lazy_dfa(self):
+        nfa = random_nfa(3, 8)
+        for policy in ('lru', 'flush'):
+            lazy = LazyDFA(nfa, max_states=4, policy=policy)
+            self.assertSameLanguage(nfa, lazy)
+            self.assertLessEqual(lazy.stats()['states'], 4)
+        self.assertFalse(LazyDFA(nfa).accepts('abc'))
+
+    def test_product(self):
+        left, right = nth_from_last_nfa(2), nth_from_last_nfa(3)
+        both = intersection(left, right)
+        self.assertEqual(both.shortest_string(), 'aaaa')
+        for string in strings('ab', 7):
+            self.assertEqual(both.accepts(string), simulate(left, string) and simulate(right, string))
+        self.assertEqual(counterexample(left, right), 'aaa')
+        self.assertTrue(equivalent(left, left.convert_to_dfa(minimize=True)))
+        self.assertTrue(difference(left, left).is_empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
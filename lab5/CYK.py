@@ -0,0 +1,129 @@
+import copy
+
+
+class CYK:
+    # Membership for a grammar in Chomsky normal form, as Grammar.cfg_to_cnf
+    # leaves it. The chart holds, for every span length and start, one boolean
+    # vector over the nonterminals. A span is filled in one step for all of its
+    # starts, splits and binary rules: the left and right parts of every split
+    # are gathered, joined with an AND per rule, ORed over the splits and then
+    # mapped onto the rule heads by a boolean matrix product.
+    #
+    # The normal form has no ε productions, so the empty string is never in the
+    # language.
+    def __init__(self, grammar):
+        import numpy as np
+
+        self.start = grammar.S
+        self.nonterminals = list(dict.fromkeys(list(grammar.Vn) + list(grammar.P)))
+        self.index = {nonterminal: i for i, nonterminal in enumerate(self.nonterminals)}
+        self.terminals = {}
+        rules = []
+        for key, productions in grammar.P.items():
+            for production in productions:
+                if len(production) == 1 and production[0] not in self.index:
+                    self.terminals.setdefault(production[0], []).append(self.index[key])
+                elif len(production) == 2 and all(symbol in self.index for symbol in production):
+                    rules.append((self.index[key], self.index[production[0]], self.index[production[1]]))
+                else:
+                    raise ValueError(f'{key} -> {production} is not in Chomsky normal form')
+        self.rules = rules
+        self.lefts = np.array([left for _, left, _ in rules], dtype=np.intp)
+        self.rights = np.array([right for _, _, right in rules], dtype=np.intp)
+        self.heads = np.zeros((len(rules), len(self.nonterminals)), dtype=bool)
+        for number, (head, _, _) in enumerate(rules):
+            self.heads[number, head] = True
+        # Row 0 of units stands for symbols that no rule produces.
+        self.symbols = {symbol: number for number, symbol in enumerate(self.terminals, 1)}
+        self.units = np.zeros((len(self.terminals) + 1, len(self.nonterminals)), dtype=bool)
+        for symbol, heads in self.terminals.items():
+            self.units[self.symbols[symbol], heads] = True
+
+    @classmethod
+    def from_cfg(cls, grammar):
+        # cfg_to_cnf rewrites the grammar in place, so a copy is converted.
+        grammar = copy.deepcopy(grammar)
+        grammar.cfg_to_cnf()
+        return cls(grammar)
+
+    def chart(self, strings):
+        # chart[length, start, string, nonterminal] for strings of one length.
+        import numpy as np
+
+        size = len(strings[0])
+        chart = np.zeros((size + 1, size, len(strings), len(self.nonterminals)), dtype=bool)
+        codes = np.array([[self.symbols.get(symbol, 0) for symbol in string] for string in strings], dtype=np.intp)
+        chart[1] = self.units[codes.T]
+        for length in range(2, size + 1):
+            starts = size - length + 1
+            splits = np.arange(1, length)
+            left = chart[1:length, :starts]
+            right = chart[(length - splits)[:, None], splits[:, None] + np.arange(starts)]
+            joined = (left[..., self.lefts] & right[..., self.rights]).any(axis=0)
+            chart[length, :starts] = joined @ self.heads
+        return chart
+
+    def recognize_many(self, strings):
+        # Strings of the same length share one chart.
+        strings = list(strings)
+        result = [False] * len(strings)
+        groups = {}
+        for position, string in enumerate(strings):
+            if len(string):
+                groups.setdefault(len(string), []).append(position)
+        start = self.index[self.start]
+        for length, positions in groups.items():
+            chart = self.chart([strings[position] for position in positions])
+            for position, accepted in zip(positions, chart[length, 0, :, start]):
+                result[position] = bool(accepted)
+        return result
+
+    def accepts(self, string):
+        return self.recognize_many([string])[0]
+
+    def forest(self, string):
+        # Shared parse forest, or None when string is not in the language. Keys are
+        # (nonterminal, start, length); a span of length 1 maps to [terminal], a
+        # longer one to its derivations (split, left key, right key). The root is
+        # (self.start, 0, len(string)).
+        if not len(string):
+            return None
+        chart = self.chart([string])[:, :, 0]
+        if not chart[len(string), 0, self.index[self.start]]:
+            return None
+        by_head = {}
+        for head, left, right in self.rules:
+            by_head.setdefault(head, []).append((left, right))
+        forest = {}
+        stack = [(self.start, 0, len(string))]
+        while stack:
+            key = stack.pop()
+            if key in forest:
+                continue
+            nonterminal, start, length = key
+            if length == 1:
+                forest[key] = [string[start]]
+                continue
+            derivations = []
+            for split in range(1, length):
+                for left, right in by_head.get(self.index[nonterminal], []):
+                    if chart[split, start, left] and chart[length - split, start + split, right]:
+                        children = ((self.nonterminals[left], start, split),
+                                    (self.nonterminals[right], start + split, length - split))
+                        derivations.append((split,) + children)
+                        stack += children
+            forest[key] = derivations
+        return forest
+
+    def count_trees(self, forest, key=None):
+        # Number of parse trees below key, the root by default; more than one
+        # means the string is ambiguous.
+        if key is None:
+            key = max(forest, key=lambda item: item[2])
+        counts = {}
+        for item in sorted(forest, key=lambda item: item[2]):
+            if item[2] == 1:
+                counts[item] = 1
+            else:
+                counts[item] = sum(counts[left] * counts[right] for _, left, right in forest[item])
+        return counts[key]
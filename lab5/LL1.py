@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+
+from AbstractGrammar import AbstractGrammar
+
+EPSILON = 'ε'
+END = '$'
+FILE_VERSION = 1
+# Token types whose terminal is the type name rather than the lexeme.
+VALUE_TOKENS = {'INTEGER', 'FLOAT', 'IDENTIFIER'}
+# Terminal of each token type seen so far; '' when it is the token's value.
+TYPE_TERMINALS = {}
+
+
+class ParseError(Exception):
+    pass
+
+
+def production_symbols(production):
+    # A production is a string of one-character symbols, as elsewhere in this
+    # lab, or a list of symbol names; 'ε' and [] both stand for the empty one.
+    if isinstance(production, str):
+        return [] if production == EPSILON else list(production)
+    return [symbol for symbol in production if symbol != EPSILON]
+
+
+def first_sets(grammar):
+    first = {nonterminal: set() for nonterminal in grammar.Vn}
+    changes = True
+    while changes:
+        changes = False
+        for key, productions in grammar.P.items():
+            for production in productions:
+                symbols = sequence_first(production_symbols(production), first)
+                if not symbols <= first[key]:
+                    first[key] |= symbols
+                    changes = True
+    return first
+
+
+def sequence_first(symbols, first):
+    # FIRST of a string of symbols; contains ε when all of them can vanish.
+    result = set()
+    for symbol in symbols:
+        if symbol not in first:
+            result.add(symbol)
+            return result
+        result |= first[symbol] - {EPSILON}
+        if EPSILON not in first[symbol]:
+            return result
+    result.add(EPSILON)
+    return result
+
+
+def follow_sets(grammar, first):
+    follow = {nonterminal: set() for nonterminal in grammar.Vn}
+    follow[grammar.S].add(END)
+    changes = True
+    while changes:
+        changes = False
+        for key, productions in grammar.P.items():
+            for production in productions:
+                symbols = production_symbols(production)
+                for i, symbol in enumerate(symbols):
+                    if symbol not in follow:
+                        continue
+                    rest = sequence_first(symbols[i + 1:], first)
+                    new = rest - {EPSILON}
+                    if EPSILON in rest:
+                        new |= follow[key]
+                    if not new <= follow[symbol]:
+                        follow[symbol] |= new
+                        changes = True
+    return follow
+
+
+def token_terminal(token):
+    # Terminal for a lab3/lab6 Token: the type name for numbers and identifiers,
+    # the lexeme for keywords and punctuation, END for EOF. Anything else, such
+    # as the characters of a str, is its own terminal.
+    kind = getattr(token, 'type', None)
+    if kind is None:
+        return token
+    name = TYPE_TERMINALS.get(kind)
+    if name is None:
+        name = END if kind.name == 'EOF' else kind.name if kind.name in VALUE_TOKENS else ''
+        TYPE_TERMINALS[kind] = name
+    return name or token.value
+
+
+class LL1Table:
+    # LL(1) parse table of a grammar: table[nonterminal][terminal] is the
+    # production, as a tuple of symbols, to expand when that terminal is next.
+    # Every cell claimed by more than one production is listed in `conflicts`,
+    # and the table keeps the first of them.
+    def __init__(self, grammar):
+        self.start = grammar.S
+        self.nonterminals = list(grammar.Vn)
+        self.terminals = list(grammar.Vt)
+        self.fingerprint = grammar_fingerprint(grammar)
+        self.first = first_sets(grammar)
+        self.follow = follow_sets(grammar, self.first)
+        self.table = {nonterminal: {} for nonterminal in grammar.Vn}
+        self.conflicts = []
+        claims = {}
+        for key, productions in grammar.P.items():
+            for production in productions:
+                symbols = tuple(production_symbols(production))
+                lookahead = sequence_first(symbols, self.first)
+                if EPSILON in lookahead:
+                    lookahead = (lookahead - {EPSILON}) | self.follow[key]
+                for terminal in lookahead:
+                    claims.setdefault((key, terminal), []).append(symbols)
+        for (key, terminal), candidates in claims.items():
+            self.table[key][terminal] = candidates[0]
+            if len(candidates) > 1:
+                self.conflicts.append((key, terminal, candidates))
+        self.reversed = None
+
+    @classmethod
+    def cached(cls, grammar, path):
+        # The table saved at path, unless it is missing, unreadable or was built
+        # for another grammar, in which case it is rebuilt and saved.
+        if os.path.exists(path):
+            try:
+                table = cls.load(path)
+            except (ValueError, KeyError):
+                table = None
+            if table is not None and table.fingerprint == grammar_fingerprint(grammar):
+                return table
+        table = cls(grammar)
+        table.save(path)
+        return table
+
+    def is_ll1(self):
+        return not self.conflicts
+
+    def report(self):
+        lines = []
+        for key, terminal, candidates in self.conflicts:
+            choices = ' | '.join(' '.join(symbols) or EPSILON for symbols in candidates)
+            lines.append(f'{key} on {terminal}: {choices}')
+        return '\n'.join(lines)
+
+    def save(self, path):
+        data = {
+            'version': FILE_VERSION,
+            'fingerprint': self.fingerprint,
+            'start': self.start,
+            'nonterminals': self.nonterminals,
+            'terminals': self.terminals,
+            'table': [[key, terminal, list(symbols)] for key, row in self.table.items()
+                      for terminal, symbols in row.items()],
+            'conflicts': [[key, terminal, [list(symbols) for symbols in candidates]]
+                          for key, terminal, candidates in self.conflicts],
+        }
+        with open(path, 'w') as file:
+            json.dump(data, file)
+
+    @classmethod
+    def load(cls, path):
+        # FIRST and FOLLOW are not saved; only the table is needed to parse.
+        with open(path) as file:
+            data = json.load(file)
+        if data.get('version') != FILE_VERSION:
+            raise ValueError(f'Unsupported parse table version {data.get("version")}')
+        table = cls.__new__(cls)
+        table.start = data['start']
+        table.nonterminals = data['nonterminals']
+        table.terminals = data['terminals']
+        table.fingerprint = data['fingerprint']
+        table.first = table.follow = table.reversed = None
+        table.table = {nonterminal: {} for nonterminal in table.nonterminals}
+        for key, terminal, symbols in data['table']:
+            table.table[key][terminal] = tuple(symbols)
+        table.conflicts = [(key, terminal, [tuple(symbols) for symbols in candidates])
+                           for key, terminal, candidates in data['conflicts']]
+        return table
+
+    def expansions(self):
+        # table with every production reversed, ready to be pushed on a stack.
+        if self.reversed is None:
+            self.reversed = {key: {terminal: symbols[::-1] for terminal, symbols in row.items()}
+                             for key, row in self.table.items()}
+        return self.reversed
+
+    def check(self):
+        if self.conflicts:
+            raise Exception(f'Grammar is not LL(1):\n{self.report()}')
+
+    def recognize(self, tokens, terminal=token_terminal):
+        # Predictive parse with an explicit stack, so input length and nesting are
+        # not limited by recursion; raises ParseError on the first unexpected
+        # token. Input that does not end in an EOF token is ended with END.
+        self.check()
+        table = self.expansions()
+        stream = iter(tokens)
+        token = next(stream, END)
+        lookahead = terminal(token)
+        stack = [END, self.start]
+        pop, extend = stack.pop, stack.extend
+        while True:
+            symbol = pop()
+            row = table.get(symbol)
+            if row is None:
+                if symbol != lookahead:
+                    raise ParseError(f'Expected {symbol}, but got {token}')
+                if symbol == END:
+                    return
+                token = next(stream, END)
+                lookahead = terminal(token)
+            else:
+                symbols = row.get(lookahead)
+                if symbols is None:
+                    raise ParseError(f'Unexpected {token} while parsing {symbol}')
+                extend(symbols)
+
+    def accepts(self, tokens, terminal=token_terminal):
+        self.check()
+        try:
+            self.recognize(tokens, terminal)
+        except ParseError:
+            return False
+        return True
+
+    def parse(self, tokens, terminal=token_terminal):
+        # As recognize(), but returns the parse tree: a nonterminal is (symbol,
+        # children) and a terminal is the token it matched.
+        self.check()
+        table = self.table
+        stream = iter(tokens)
+        token = next(stream, END)
+        lookahead = terminal(token)
+        root = (self.start, [])
+        # Entries are (symbol, children, index): a nonterminal fills in its own
+        # children list when expanded, a terminal sets children[index] to its token.
+        stack = [(END, None, 0), (self.start, root[1], 0)]
+        while True:
+            symbol, children, index = stack.pop()
+            row = table.get(symbol)
+            if row is None:
+                if symbol != lookahead:
+                    raise ParseError(f'Expected {symbol}, but got {token}')
+                if symbol == END:
+                    return root
+                children[index] = token
+                token = next(stream, END)
+                lookahead = terminal(token)
+                continue
+            symbols = row.get(lookahead)
+            if symbols is None:
+                raise ParseError(f'Unexpected {token} while parsing {symbol}')
+            offset = len(children)
+            children += [(child, []) if child in table else None for child in symbols]
+            for index in range(len(children) - 1, offset - 1, -1):
+                node = children[index]
+                stack.append((symbols[index - offset], children, index) if node is None else
+                             (node[0], node[1], 0))
+
+
+def grammar_fingerprint(grammar):
+    data = json.dumps([grammar.Vn, grammar.Vt, grammar.P, grammar.S], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def statement_grammar():
+    # The statement language of lab6, in the form LL(1) needs: no left recursion,
+    # and `else` only after an `if` whose branch is a return.
+    return AbstractGrammar(
+        ['Program', 'Statement', 'Return', 'Else', 'Expr', 'ExprTail', 'Term', 'TermTail', 'Factor',
+         'AddOp', 'MulOp'],
+        ['if', 'else', 'return', '(', ')', ';', '+', '-', '*', '/', '>', '<', 'INTEGER', 'FLOAT', 'IDENTIFIER'],
+        {
+            'Program': [['Statement', 'Program'], []],
+            'Statement': [['Return'], ['if', '(', 'Expr', ')', 'Return', 'Else']],
+            'Return': [['return', 'Expr', ';']],
+            'Else': [['else', 'Statement'], []],
+            'Expr': [['Term', 'ExprTail']],
+            'ExprTail': [['AddOp', 'Term', 'ExprTail'], []],
+            'Term': [['Factor', 'TermTail']],
+            'TermTail': [['MulOp', 'Factor', 'TermTail'], []],
+            'Factor': [['INTEGER'], ['FLOAT'], ['IDENTIFIER']],
+            'AddOp': [['+'], ['-'], ['>'], ['<']],
+            'MulOp': [['*'], ['/']],
+        },
+        'Program')
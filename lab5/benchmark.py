@@ -0,0 +1,119 @@
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+
+from AbstractGrammar import AbstractGrammar
+from CYK import CYK
+from LL1 import LL1Table, statement_grammar
+
+LAB6 = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lab6')
+
+
+def lab6():
+    # The lab6 lexer and parser, to produce tokens and to compare against. Its
+    # benchmark module is loaded under another name, since this one is
+    # `benchmark` too.
+    sys.path.append(LAB6)
+    from Lexer import Lexer
+    from Parser import Parser
+
+    spec = importlib.util.spec_from_file_location('lab6_benchmark', os.path.join(LAB6, 'benchmark.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return Lexer, Parser, module.random_source
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f'{label:<40} {time.perf_counter() - start:8.3f} s  -> {result}')
+    return result
+
+
+def bench_ll1(statements=100_000):
+    Lexer, Parser, random_source = lab6()
+    tokens = Lexer(random_source(statements)).get_all_tokens()
+    print(f'Parsing {len(tokens):,} tokens')
+
+    def cells(table):
+        return f'{sum(len(row) for row in table.table.values())} cells'
+
+    timed('LL1Table', lambda: cells(LL1Table(statement_grammar())))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'table.json')
+        LL1Table.cached(statement_grammar(), path)
+        table = LL1Table.cached(statement_grammar(), path)
+        timed('LL1Table.cached (from disk)', lambda: cells(LL1Table.cached(statement_grammar(), path)))
+    timed('recursive descent (lab6 Parser)', lambda: sum(1 for _ in Parser(tokens).statements()))
+    timed('LL(1) driver, recognize', table.accepts, tokens)
+    timed('LL(1) driver, parse tree', lambda: len(table.parse(tokens)[1]))
+    depth = 200_000
+    deep = ['return', 'INTEGER'] + ['+', 'INTEGER'] * depth + [';']
+    timed(f'LL(1) driver, {depth:,}-term expression', table.accepts, deep)
+
+
+def naive_cyk(grammar, string):
+    # Textbook CYK over sets of nonterminals, for comparison.
+    size = len(string)
+    chart = {}
+    for start, symbol in enumerate(string):
+        chart[start, 1] = {key for key, productions in grammar.P.items() if symbol in productions}
+    binary = [(key, production) for key, productions in grammar.P.items()
+              for production in productions if len(production) == 2]
+    for length in range(2, size + 1):
+        for start in range(size - length + 1):
+            cell = set()
+            for split in range(1, length):
+                left, right = chart[start, split], chart[start + split, length - split]
+                cell |= {key for key, production in binary if production[0] in left and production[1] in right}
+            chart[start, length] = cell
+    return size > 0 and grammar.S in chart[0, size]
+
+
+def random_cnf(nonterminals, rules, seed=0):
+    rng = random.Random(seed)
+    names = [chr(65 + i) for i in range(nonterminals)]
+    productions = {name: [rng.choice('ab')] for name in names}
+    for _ in range(rules):
+        productions[rng.choice(names)].append(rng.choice(names) + rng.choice(names))
+    return AbstractGrammar(names, ['a', 'b'], productions, 'A')
+
+
+def bench_cyk(count=1000):
+    from main import Grammar
+
+    grammar = Grammar(['S', 'A', 'B', 'C', 'D'], ['a', 'b'], {
+        'S': ['aB', 'bA', 'A'],
+        'A': ['B', 'AS', 'bBAB', 'b'],
+        'B': ['b', 'bS', 'aD', 'ε'],
+        'C': ['Ba'],
+        'D': ['AA'],
+    }, 'S')
+    cyk = CYK.from_cfg(grammar)
+    grammar.cfg_to_cnf()
+    rng = random.Random(0)
+    print(f'CYK, {len(cyk.nonterminals)} nonterminals and {len(cyk.rules)} binary rules')
+    for length in (25, 50, 100, 200, 400):
+        string = ''.join(rng.choice('ab') for _ in range(length))
+        start = time.perf_counter()
+        expected = naive_cyk(grammar, string) if length <= 100 else None
+        naive = time.perf_counter() - start
+        accepted = timed(f'length {length}', cyk.accepts, string)
+        if expected is not None:
+            assert accepted == expected
+            print(f'{"  textbook CYK":<40} {naive:8.3f} s')
+    strings = [''.join(rng.choice('ab') for _ in range(20)) for _ in range(count)]
+    timed(f'{count} strings of length 20, one by one', lambda: sum(cyk.accepts(string) for string in strings))
+    timed(f'{count} strings of length 20, batched', lambda: sum(cyk.recognize_many(strings)))
+    string = ''.join(rng.choice('ab') for _ in range(100))
+    for nonterminals in (5, 10, 20, 26):
+        cyk = CYK(random_cnf(nonterminals, 4 * nonterminals))
+        timed(f'{nonterminals} nonterminals, {4 * nonterminals} rules, length 100', cyk.accepts, string)
+
+
+if __name__ == '__main__':
+    bench_ll1()
+    bench_cyk()
@@ -1,5 +1,9 @@
 from AbstractGrammar import AbstractGrammar
+from CYK import CYK
+from LL1 import LL1Table, statement_grammar
 from itertools import combinations
+import os
+import tempfile
 import unittest
 
 
@@ -52,6 +56,64 @@ class TestGrammarMethods(unittest.TestCase):
         self.grammar.cfg_to_cnf()
         self.grammar.print_grammar()
 
+    def test_ll1_first_follow(self):
+        grammar = Grammar(['E', 'A', 'T'], ['a', '+'], {'E': ['TA'], 'A': ['+TA', 'ε'], 'T': ['a']}, 'E')
+        table = LL1Table(grammar)
+        self.assertEqual(table.first, {'E': {'a'}, 'A': {'+', 'ε'}, 'T': {'a'}})
+        self.assertEqual(table.follow, {'E': {'$'}, 'A': {'$'}, 'T': {'+', '$'}})
+        self.assertTrue(table.is_ll1())
+        self.assertEqual(table.parse('a+a'), ('E', [('T', ['a']), ('A', ['+', ('T', ['a']), ('A', [])])]))
+        self.assertFalse(table.accepts('a+'))
+
+    def test_ll1_conflicts(self):
+        table = LL1Table(self.grammar)
+        self.assertFalse(table.is_ll1())
+        # A -> AS is left recursive, so it competes with every other A production.
+        self.assertIn(('A', 'b', [('B',), ('A', 'S'), ('b', 'B', 'A', 'B'), ('b',)]), table.conflicts)
+        with self.assertRaises(Exception):
+            table.parse('ab')
+        ambiguous = LL1Table(Grammar(['S', 'A', 'B'], ['a', 'b'], {'S': ['aA', 'aB'], 'A': ['b'], 'B': ['b']}, 'S'))
+        with self.assertRaises(Exception):
+            ambiguous.accepts('ab')
+
+    def test_ll1_statements(self):
+        table = LL1Table(statement_grammar())
+        self.assertTrue(table.is_ll1(), table.report())
+        tokens = ['if', '(', 'IDENTIFIER', '>', 'INTEGER', ')', 'return', 'IDENTIFIER', '*', 'INTEGER', ';',
+                  'else', 'return', 'FLOAT', ';']
+        self.assertTrue(table.accepts(tokens))
+        self.assertTrue(table.accepts(['return', 'INTEGER'] + ['+', 'INTEGER'] * 10000 + [';']))
+        self.assertFalse(table.accepts(['else', 'return', 'INTEGER', ';']))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table.json')
+            LL1Table.cached(statement_grammar(), path)
+            cached = LL1Table.cached(statement_grammar(), path)
+            self.assertIsNone(cached.first)
+            self.assertEqual(cached.parse(tokens), table.parse(tokens))
+            for stale in ('{"version": 0}', '{'):
+                with open(path, 'w') as file:
+                    file.write(stale)
+                self.assertEqual(LL1Table.cached(statement_grammar(), path).table, table.table)
+                self.assertEqual(LL1Table.load(path).table, table.table)
+
+    def test_cyk_recognition(self):
+        cyk = CYK.from_cfg(self.grammar)
+        self.assertEqual(self.grammar.S, 'S')
+        strings = ['a', 'b', 'ab', 'ba', 'abab', 'bab', '', 'c', 'abc']
+        self.assertEqual(cyk.recognize_many(strings), [True, True, True, True, True, True, False, False, False])
+        balanced = CYK.from_cfg(Grammar(['S'], ['a', 'b'], {'S': ['aSb', 'ab']}, 'S'))
+        self.assertTrue(balanced.accepts('a' * 40 + 'b' * 40))
+        self.assertFalse(balanced.accepts('a' * 40 + 'b' * 39))
+
+    def test_cyk_forest(self):
+        cyk = CYK.from_cfg(Grammar(['S'], ['a', '+'], {'S': ['S+S', 'a']}, 'S'))
+        self.assertIsNone(cyk.forest('a+'))
+        forest = cyk.forest('a+a+a')
+        root = (cyk.start, 0, 5)
+        self.assertEqual(len(forest[root]), 2)
+        self.assertEqual(cyk.count_trees(forest), 2)
+        self.assertEqual(cyk.count_trees(cyk.forest('a+a+a+a')), 5)
+
 
 class Grammar(AbstractGrammar):
     def cfg_to_cnf(self):
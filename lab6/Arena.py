@@ -0,0 +1,139 @@
+from array import array
+
+from Lexer import Token
+from Parser import BinaryOpNode, BlockNode, IfNode, NumNode, ReturnNode, VarNode
+
+NUM, VAR, BINARY, IF, RETURN, BLOCK = range(6)
+NAMES = ('NumNode', 'VarNode', 'BinaryOpNode', 'IfNode', 'ReturnNode', 'BlockNode')
+
+
+class Arena:
+    # AST stored as rows of parallel int arrays; a node is its row number.
+    #   NUM, VAR      first = value id
+    #   BINARY        first = left, second = operator value id, third = right
+    #   IF            first = condition, second = true block, third = false block or -1
+    #   RETURN        first = expression
+    #   BLOCK         first = offset in `children`, second = number of statements
+    # Numbers, names and operators are interned in `values`.
+    def __init__(self):
+        self.kinds = array('B')
+        self.first = array('i')
+        self.second = array('i')
+        self.third = array('i')
+        self.children = array('i')
+        self.values = []
+        self.value_ids = {}
+        self.value_types = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        return iter(range(len(self.kinds)))
+
+    def intern(self, token):
+        # Keyed by type as well, so that 5 and 5.0 stay apart.
+        key = (token.type, type(token.value), token.value)
+        value = self.value_ids.get(key)
+        if value is None:
+            value = self.value_ids[key] = len(self.values)
+            self.values.append(token.value)
+            self.value_types.append(token.type)
+        return value
+
+    def add(self, kind, first, second=-1, third=-1):
+        self.kinds.append(kind)
+        self.first.append(first)
+        self.second.append(second)
+        self.third.append(third)
+        return len(self.kinds) - 1
+
+    def num(self, token):
+        return self.add(NUM, self.intern(token))
+
+    def var(self, token):
+        return self.add(VAR, self.intern(token))
+
+    def binary(self, left, op, right):
+        return self.add(BINARY, left, self.intern(op), right)
+
+    def conditional(self, condition, true_block, false_block=None):
+        return self.add(IF, condition, true_block, -1 if false_block is None else false_block)
+
+    def ret(self, expression):
+        return self.add(RETURN, expression)
+
+    def block(self, statements):
+        offset = len(self.children)
+        self.children.extend(statements)
+        return self.add(BLOCK, offset, len(statements))
+
+    def kind(self, node):
+        return NAMES[self.kinds[node]]
+
+    def value(self, node):
+        return self.values[self.first[node] if self.kinds[node] != BINARY else self.second[node]]
+
+    def token(self, value):
+        return Token(self.value_types[value], self.values[value])
+
+    def walk(self, root):
+        # Preorder, without recursion.
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            yield node
+            kind = self.kinds[node]
+            if kind == BINARY:
+                stack += [self.third[node], self.first[node]]
+            elif kind == IF:
+                stack += [child for child in (self.third[node], self.second[node], self.first[node]) if child >= 0]
+            elif kind == RETURN:
+                stack.append(self.first[node])
+            elif kind == BLOCK:
+                offset = self.first[node]
+                stack += reversed(self.children[offset:offset + self.second[node]])
+
+    def render(self, node):
+        # Same text as repr() of the equivalent node objects.
+        if node is None or node < 0:
+            return 'None'
+        kind = self.kinds[node]
+        if kind == NUM:
+            return f"NumNode({self.values[self.first[node]]})"
+        if kind == VAR:
+            return f"VarNode({self.values[self.first[node]]})"
+        if kind == BINARY:
+            return (f"BinaryOpNode({self.render(self.first[node])}, {self.values[self.second[node]]}, "
+                    f"{self.render(self.third[node])})")
+        if kind == IF:
+            return (f"IfNode({self.render(self.first[node])}, {self.render(self.second[node])}, "
+                    f"{self.render(self.third[node])})")
+        if kind == RETURN:
+            return f"ReturnNode({self.render(self.first[node])})"
+        offset = self.first[node]
+        statements = ', '.join(self.render(child) for child in self.children[offset:offset + self.second[node]])
+        return f"BlockNode([{statements}])"
+
+    def to_nodes(self, node):
+        if node is None or node < 0:
+            return None
+        kind = self.kinds[node]
+        if kind == NUM:
+            return NumNode(self.token(self.first[node]))
+        if kind == VAR:
+            return VarNode(self.token(self.first[node]))
+        if kind == BINARY:
+            return BinaryOpNode(self.to_nodes(self.first[node]), self.token(self.second[node]),
+                                self.to_nodes(self.third[node]))
+        if kind == IF:
+            return IfNode(self.to_nodes(self.first[node]), self.to_nodes(self.second[node]),
+                          self.to_nodes(self.third[node]))
+        if kind == RETURN:
+            return ReturnNode(self.to_nodes(self.first[node]))
+        offset = self.first[node]
+        return BlockNode([self.to_nodes(child) for child in self.children[offset:offset + self.second[node]]])
+
+    def nbytes(self):
+        columns = (self.kinds, self.first, self.second, self.third, self.children)
+        return sum(len(column) * column.itemsize for column in columns)
@@ -0,0 +1,167 @@
+from bisect import bisect_left, bisect_right
+
+from Lexer import RULE_TYPES, RULE_VALUES, SCANNER, Token, TokenType
+from Parser import BlockNode, Parser
+
+
+class Segment:
+    # One top-level statement: its source text, its tokens with their offsets
+    # from the segment start, and its AST. A segment runs from its first token to
+    # the next segment, so the segments tile the text; the first one also holds
+    # any leading whitespace. The last segment stands for EOF and has no AST.
+    __slots__ = ('start', 'text', 'tokens', 'offsets', 'ast')
+
+    def __init__(self, start, text, tokens, offsets, ast):
+        self.start = start
+        self.text = text
+        self.tokens = tokens
+        self.offsets = offsets
+        self.ast = ast
+
+
+class Document:
+    # Source text kept lexed and parsed across edits. An edit re-lexes from the
+    # statement before it and re-parses statement by statement until a new
+    # statement ends where an old one, past the edit, began; from there on the
+    # old segments are reused as they are.
+    #
+    # Segment starts form a gap buffer: before `gap` they are offsets from the
+    # start of the text, from `gap` on offsets from its end, which an edit at the
+    # gap leaves valid. Moving the gap costs one update per segment it passes, so
+    # edits near each other never touch the rest of the document, and neither
+    # does building the new text, which is only joined when `text` is read.
+    #
+    # An edit that leaves the text invalid raises and changes nothing.
+    def __init__(self, text='', chunk_size=1024):
+        self.segments = [Segment(0, '', [], [], None)]
+        self.gap = 0
+        self.size = 0
+        self.joined = ''
+        self.chunk_size = chunk_size
+        self.edit(0, 0, text)
+
+    def __len__(self):
+        return len(self.segments) - 1
+
+    @property
+    def text(self):
+        if self.joined is None:
+            self.joined = ''.join(segment.text for segment in self.segments)
+        return self.joined
+
+    def start(self, index):
+        segment = self.segments[index]
+        return segment.start if index < self.gap else segment.start + self.size
+
+    def locate(self, offset):
+        # Index of the segment holding offset.
+        left = bisect_right(self.segments, offset, 0, self.gap, key=segment_start)
+        if left < self.gap:
+            return max(left - 1, 0)
+        right = bisect_right(self.segments, offset - self.size, self.gap, len(self.segments), key=segment_start)
+        return max(right - 1, 0)
+
+    def move_gap(self, index):
+        while self.gap < index:
+            self.segments[self.gap].start += self.size
+            self.gap += 1
+        while self.gap > index:
+            self.gap -= 1
+            self.segments[self.gap].start -= self.size
+
+    def edit(self, start, end, replacement):
+        # Replaces text[start:end] and returns the range of segments re-parsed.
+        if not 0 <= start <= end <= self.size:
+            raise ValueError(f'Edit range {start}:{end} outside of text of length {self.size}')
+        # The statement before the edit is re-parsed too, since an `if` there may
+        # gain an `else`.
+        first = max(self.locate(start) - 1, 0)
+        self.move_gap(first)
+        pos = self.start(first)
+        size = self.size - (end - start) + len(replacement)
+        resume = start + len(replacement)
+
+        read, tokens, offsets = [], [], []
+        parser = Parser(self.lex(self.source(first, start, end, replacement, read), pos, size, tokens, offsets))
+        parsed = []
+        while True:
+            index = parser.current_token_index
+            begin = offsets[index] if parsed or first else 0
+            if parser.current_token.type == TokenType.EOF:
+                parsed.append((begin, index, index, None))
+                boundary, stop = size, len(self.segments)
+                break
+            ast = parser.statement()
+            parsed.append((begin, index, parser.current_token_index, ast))
+            boundary = offsets[parser.current_token_index]
+            if boundary >= resume:
+                # Old segments past the edit keep their offsets from the end.
+                old = bisect_left(self.segments, boundary - size, first, len(self.segments), key=segment_start)
+                if old < len(self.segments) and self.segments[old].start == boundary - size:
+                    stop = old
+                    break
+
+        region = ''.join(read)
+        segments = []
+        for number, (begin, low, high, ast) in enumerate(parsed):
+            limit = parsed[number + 1][0] if number + 1 < len(parsed) else boundary
+            segments.append(Segment(begin, region[begin - pos:limit - pos], tokens[low:high],
+                                    [offset - begin for offset in offsets[low:high]], ast))
+        self.segments[first:stop] = segments
+        self.gap = first + len(segments)
+        self.size = size
+        self.joined = None
+        return range(first, self.gap)
+
+    def source(self, index, start, end, replacement, read):
+        # The text from segment index on, with text[start:end] replaced, in chunks;
+        # every chunk handed out is also kept in read.
+        offset = self.start(index)
+        pieces = []
+        for index in range(index, len(self.segments)):
+            text = self.segments[index].text
+            if offset < start:
+                pieces.append(text[:start - offset])
+            if start <= offset + len(text) and replacement is not None:
+                pieces.append(replacement)
+                replacement = None
+            if offset + len(text) > end:
+                pieces.append(text[max(end - offset, 0):])
+            offset += len(text)
+            for piece in pieces:
+                for chunk in range(0, len(piece), self.chunk_size):
+                    read.append(piece[chunk:chunk + self.chunk_size])
+                    yield read[-1]
+            pieces.clear()
+
+    def lex(self, chunks, pos, size, tokens, offsets):
+        # Tokens with their offsets are recorded as the parser pulls them, so only
+        # the text it reads is scanned.
+        for rule, lexeme, offset in SCANNER.scan_chunks(chunks):
+            token = Token(RULE_TYPES[rule], RULE_VALUES[rule](lexeme) if RULE_VALUES[rule] else lexeme)
+            tokens.append(token)
+            offsets.append(pos + offset)
+            yield token
+        offsets.append(size)
+        yield Token(TokenType.EOF)
+
+    def statements(self):
+        return [self.segments[index].ast for index in range(len(self.segments) - 1)]
+
+    def ast(self):
+        return BlockNode(self.statements())
+
+    def spans(self):
+        # (start, end, ast) of every statement, including trailing whitespace.
+        for index in range(len(self.segments) - 1):
+            yield self.start(index), self.start(index + 1), self.segments[index].ast
+
+    def tokens(self):
+        return [token for segment in self.segments for token in segment.tokens] + [Token(TokenType.EOF)]
+
+    def token_offsets(self):
+        return [self.start(index) + offset for index, segment in enumerate(self.segments) for offset in segment.offsets]
+
+
+def segment_start(segment):
+    return segment.start
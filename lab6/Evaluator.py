@@ -0,0 +1,317 @@
+import math
+import operator
+from collections import Counter
+
+from Parser import BinaryOpNode, BlockNode, IfNode, NumNode, ReturnNode, VarNode, children
+
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '>': operator.gt,
+    '<': operator.lt,
+}
+# Longest operator chain that generated code writes as one expression.
+INLINE_STEPS = 8
+
+
+class Evaluator:
+    # Compiles an AST once and evaluates it against variable bindings. A
+    # statement evaluates to the value it returns, or None when no return is
+    # reached, as for an `if` whose condition fails and that has no `else`.
+    #
+    # evaluate() runs closures built from the tree, evaluate_code() a Python
+    # function compiled from source generated for it on first use, and
+    # evaluate_batch() takes one NumPy array per variable and evaluates every
+    # record at once, one array operation per node. Nodes shared by several
+    # parents (see Passes.share_subexpressions) are compiled once, and in a batch
+    # their result is computed once.
+    #
+    # Trees are compiled with explicit stacks and operator chains, which the
+    # parser builds left-deep, become one loop (closures) or one assignment per
+    # operator (code), so any tree the parser can build is compiled.
+    def __init__(self, ast):
+        self.ast = ast
+        self.parents = Counter(id(child) for node in unique_nodes(ast) for child in children(node))
+        self.compiled = {}
+        self.closure = self.build(ast)
+        self.names = sorted({node.value for node in unique_nodes(ast) if isinstance(node, VarNode)})
+        self.temporaries = 0
+        self.function = None
+        self.batch = None
+
+    def evaluate(self, bindings):
+        return self.closure(bindings)
+
+    def evaluate_code(self, bindings):
+        if self.function is None:
+            namespace = {}
+            exec(compile(self.code(), '<ast>', 'exec'), namespace)
+            self.function = namespace['evaluate']
+        return self.function(bindings)
+
+    def evaluate_many(self, records):
+        closure = self.closure
+        return [closure(bindings) for bindings in records]
+
+    def evaluate_batch(self, columns):
+        # Returns (values, returned): a float array of results and a boolean array
+        # telling which records returned at all. Division by zero and overflow give
+        # inf or nan here, without raising or warning.
+        import numpy as np
+
+        if self.batch is None:
+            self.compiled = {}
+            self.batch = self.build_batch(self.ast)
+        self.results = {}
+        size = len(next(iter(columns.values()))) if columns else 1
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            values, returned = self.batch({name: np.asarray(column) for name, column in columns.items()})
+        values = np.broadcast_to(np.asarray(values, dtype=float), (size,))
+        returned = np.broadcast_to(np.asarray(returned, dtype=bool), (size,))
+        return values, returned
+
+    def chain(self, node):
+        # A left-deep operator chain as its innermost left operand and the
+        # (operator, right operand) steps applied to it in order. A shared operand
+        # ends the chain, so that it is still compiled once.
+        steps = []
+        while isinstance(node, BinaryOpNode) and (not steps or self.parents[id(node)] <= 1):
+            steps.append((node.op.value, node.right))
+            node = node.left
+        steps.reverse()
+        return node, steps
+
+    def operands(self, node):
+        if isinstance(node, BinaryOpNode):
+            first, steps = self.chain(node)
+            return [first] + [right for _, right in steps]
+        return children(node)
+
+    def build_all(self, ast, build_node):
+        # Compiles the operands of a node before the node itself; build_node finds
+        # them in self.compiled.
+        compiled = self.compiled
+        stack = [ast]
+        while stack:
+            node = stack[-1]
+            if id(node) in compiled:
+                stack.pop()
+                continue
+            waiting = [operand for operand in self.operands(node) if id(operand) not in compiled]
+            if waiting:
+                stack += waiting
+            else:
+                stack.pop()
+                compiled[id(node)] = build_node(node)
+        return compiled[id(ast)]
+
+    def build(self, ast):
+        return self.build_all(ast, self.build_node)
+
+    def build_node(self, node):
+        compiled = self.compiled
+        if isinstance(node, NumNode):
+            value = node.value
+            return lambda bindings: value
+        if isinstance(node, VarNode):
+            name = node.value
+            return lambda bindings: bindings[name]
+        if isinstance(node, BinaryOpNode):
+            first, steps = self.chain(node)
+            first = compiled[id(first)]
+            steps = [(OPERATORS[op], compiled[id(right)]) for op, right in steps]
+            if len(steps) == 1:
+                (apply, right), = steps
+                return lambda bindings: apply(first(bindings), right(bindings))
+
+            def chain(bindings):
+                value = first(bindings)
+                for apply, right in steps:
+                    value = apply(value, right(bindings))
+                return value
+
+            return chain
+        if isinstance(node, ReturnNode):
+            return compiled[id(node.expression)]
+        if isinstance(node, IfNode):
+            condition, true_block = compiled[id(node.condition)], compiled[id(node.true_block)]
+            if node.false_block is None:
+                return lambda bindings: true_block(bindings) if condition(bindings) else None
+            false_block = compiled[id(node.false_block)]
+            return lambda bindings: true_block(bindings) if condition(bindings) else false_block(bindings)
+        if isinstance(node, BlockNode):
+            # Statements run in order and the first one that returns wins.
+            statements = [compiled[id(statement)] for statement in node.statements]
+
+            def block(bindings):
+                for statement in statements:
+                    value = statement(bindings)
+                    if value is not None:
+                        return value
+                return None
+
+            return block
+        raise Exception(f'Cannot evaluate {node!r}')
+
+    def code(self):
+        # Source of evaluate(bindings). Every statement leaves its value in _t and
+        # the first one that is not None is returned.
+        self.temporaries = 0
+        lines = ['def evaluate(bindings):']
+        self.statement_code(self.ast, lines, '    ')
+        lines.append('    return _t')
+        return '\n'.join(lines) + '\n'
+
+    def temporary(self):
+        self.temporaries += 1
+        return f'_{self.temporaries}'
+
+    def statement_code(self, node, lines, indent):
+        if isinstance(node, BlockNode):
+            for statement in node.statements:
+                self.statement_code(statement, lines, indent)
+                lines.append(f'{indent}if _t is not None:')
+                lines.append(f'{indent}    return _t')
+            lines.append(f'{indent}_t = None')
+        elif isinstance(node, IfNode) and not isinstance(node.false_block, IfNode):
+            condition = self.expression_code(node.condition, lines, indent)
+            lines.append(f'{indent}if {condition}:')
+            self.statement_code(node.true_block, lines, indent + '    ')
+            lines.append(f'{indent}else:')
+            if node.false_block is None:
+                lines.append(f'{indent}    _t = None')
+            else:
+                self.statement_code(node.false_block, lines, indent + '    ')
+        elif isinstance(node, IfNode):
+            # An else if chain stays flat: each branch only runs while a flag says
+            # that no condition has held yet.
+            taken = self.temporary()
+            lines.append(f'{indent}{taken} = False')
+            while isinstance(node, IfNode):
+                lines.append(f'{indent}if not {taken}:')
+                condition = self.expression_code(node.condition, lines, indent + '    ')
+                lines.append(f'{indent}    if {condition}:')
+                lines.append(f'{indent}        {taken} = True')
+                self.statement_code(node.true_block, lines, indent + '        ')
+                node = node.false_block
+            lines.append(f'{indent}if not {taken}:')
+            if node is None:
+                lines.append(f'{indent}    _t = None')
+            else:
+                self.statement_code(node, lines, indent + '    ')
+        else:
+            lines.append(f'{indent}_t = {self.expression_code(node, lines, indent)}')
+
+    def expression_code(self, node, lines, indent):
+        # An expression for node. Short operator chains are written out in place;
+        # longer ones are computed into a temporary by the lines added first.
+        if isinstance(node, NumNode):
+            # A float literal too large for a float is inf, which has no literal.
+            if isinstance(node.value, float) and not math.isfinite(node.value):
+                return f"float('{node.value}')"
+            return repr(node.value)
+        if isinstance(node, VarNode):
+            return f'bindings[{node.value!r}]'
+        if isinstance(node, ReturnNode):
+            return self.expression_code(node.expression, lines, indent)
+        if isinstance(node, BinaryOpNode):
+            steps = []
+            while isinstance(node, BinaryOpNode):
+                steps.append((node.op.value, node.right))
+                node = node.left
+            value = self.expression_code(node, lines, indent)
+            if len(steps) <= INLINE_STEPS:
+                for op, right in reversed(steps):
+                    value = f'({value} {op} {self.expression_code(right, lines, indent)})'
+                return value
+            name = self.temporary()
+            for op, right in reversed(steps):
+                lines.append(f'{indent}{name} = {value} {op} {self.expression_code(right, lines, indent)}')
+                value = name
+            return name
+        raise Exception(f'Cannot evaluate {node!r}')
+
+    def build_batch(self, ast):
+        return self.build_all(ast, self.build_batch_shared)
+
+    def build_batch_shared(self, node):
+        closure = self.build_batch_node(node)
+        if self.parents[id(node)] > 1:
+            closure = self.shared(id(node), closure)
+        return closure
+
+    def shared(self, key, closure):
+        def cached(columns):
+            if key not in self.results:
+                self.results[key] = closure(columns)
+            return self.results[key]
+
+        return cached
+
+    def build_batch_node(self, node):
+        # Each compiled node maps the columns to (values, returned); `returned` is
+        # True for expressions, so only statements carry a mask.
+        import numpy as np
+
+        compiled = self.compiled
+        if isinstance(node, NumNode):
+            # A NumPy scalar, so that dividing two constants by zero does not raise.
+            value = np.float64(node.value)
+            return lambda columns: (value, True)
+        if isinstance(node, VarNode):
+            name = node.value
+            return lambda columns: (columns[name], True)
+        if isinstance(node, BinaryOpNode):
+            first, steps = self.chain(node)
+            first = compiled[id(first)]
+            steps = [(OPERATORS[op], compiled[id(right)]) for op, right in steps]
+
+            def chain(columns):
+                values = first(columns)[0]
+                for apply, right in steps:
+                    values = apply(values, right(columns)[0])
+                return values, True
+
+            return chain
+        if isinstance(node, ReturnNode):
+            return compiled[id(node.expression)]
+        if isinstance(node, IfNode):
+            condition, true_block = compiled[id(node.condition)], compiled[id(node.true_block)]
+            false_block = compiled[id(node.false_block)] if node.false_block is not None else None
+
+            def branch(columns):
+                test = np.asarray(condition(columns)[0], dtype=bool)
+                values, returned = true_block(columns)
+                if false_block is None:
+                    return np.where(test, values, np.nan), test & returned
+                other, other_returned = false_block(columns)
+                return np.where(test, values, other), np.where(test, returned, other_returned)
+
+            return branch
+        if isinstance(node, BlockNode):
+            statements = [compiled[id(statement)] for statement in node.statements]
+
+            def block(columns):
+                values, returned = np.nan, False
+                for statement in statements:
+                    value, done = statement(columns)
+                    values = np.where(returned, values, value)
+                    returned = returned | done
+                return values, returned
+
+            return block
+        raise Exception(f'Cannot evaluate {node!r}')
+
+
+def unique_nodes(ast):
+    seen = set()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        yield node
+        stack += children(node)
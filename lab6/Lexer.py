@@ -0,0 +1,107 @@
+import codecs
+from enum import Enum, auto
+
+from Scanner import ScanError, Scanner
+
+class TokenType(Enum):
+    INTEGER = auto()
+    FLOAT = auto()
+    IDENTIFIER = auto()
+    KEYWORD = auto()
+    OPERATOR = auto()
+    LPAREN = auto()
+    RPAREN = auto()
+    SEMICOLON = auto()
+    EOF = auto()  # End of File/Stream token
+
+# Keywords in our language
+KEYWORDS = {'if', 'else', 'return'}
+# Operators in our language
+OPERATORS = {'+', '-', '*', '/', '>', '<'}
+
+class Token:
+    def __init__(self, type, value=None):
+        self.type = type
+        self.value = value
+
+    def __repr__(self):
+        return f"Token({self.type}, {repr(self.value)})"
+
+# Token definitions, compiled into one maximal-munch DFA. Keywords come before
+# IDENTIFIER so that they win ties; whitespace (kind None) is skipped.
+TOKEN_SPEC = [
+    (None, [(str.isspace, '+')]),
+    *[(TokenType.KEYWORD, keyword) for keyword in sorted(KEYWORDS)],
+    (TokenType.FLOAT, [(str.isdigit, '+'), ('.', ''), (str.isdigit, '*')]),
+    (TokenType.INTEGER, [(str.isdigit, '+')]),
+    (TokenType.IDENTIFIER, [(str.isalpha, ''), (str.isalnum, '*')]),
+    *[(TokenType.OPERATOR, operator) for operator in sorted(OPERATORS)],
+    (TokenType.LPAREN, '('),
+    (TokenType.RPAREN, ')'),
+    (TokenType.SEMICOLON, ';'),
+]
+SCANNER = Scanner(TOKEN_SPEC)
+VALUES = {TokenType.INTEGER: int, TokenType.FLOAT: float}
+# Per scanner rule: its token type and value conversion (None keeps the lexeme).
+RULE_TYPES = SCANNER.kinds
+RULE_VALUES = [VALUES.get(kind) for kind in SCANNER.kinds]
+
+class Lexer:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.codes = None
+
+    def next_token(self):
+        if self.codes is None:
+            self.codes = SCANNER.codes(self.text)
+        while self.pos < len(self.text):
+            rule, end = SCANNER.match(self.codes, self.pos)
+            if rule < 0:
+                self.error()
+            start, self.pos = self.pos, end
+            kind = SCANNER.kinds[rule]
+            if kind is not None:
+                return self.token(kind, start, end)
+        return Token(TokenType.EOF)
+
+    def token(self, kind, start, end):
+        lexeme = self.text[start:end]
+        return Token(kind, VALUES[kind](lexeme) if kind in VALUES else lexeme)
+
+    def error(self):
+        raise ScanError(f'Invalid character: {self.text[self.pos]} at position {self.pos}')
+
+    def get_all_tokens(self):
+        text = self.text
+        tokens = [Token(RULE_TYPES[rule], RULE_VALUES[rule](text[start:end]) if RULE_VALUES[rule] else text[start:end])
+                  for rule, start, end in SCANNER.scan(text, self.pos, self.codes)]
+        tokens.append(Token(TokenType.EOF))
+        self.pos = len(text)
+        return tokens
+
+
+def stream_tokens(source, chunk_size=1 << 16, encoding='utf-8'):
+    # Lazily tokenizes a str, a text or binary file object or an mmap, reading
+    # chunk_size characters (or bytes) at a time, and ends with an EOF token.
+    for rule, lexeme, _ in SCANNER.scan_chunks(read_chunks(source, chunk_size, encoding)):
+        yield Token(RULE_TYPES[rule], RULE_VALUES[rule](lexeme) if RULE_VALUES[rule] else lexeme)
+    yield Token(TokenType.EOF)
+
+
+def read_chunks(source, chunk_size, encoding):
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+    decoder = None
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if not isinstance(chunk, str):
+            decoder = decoder or codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        yield decoder.decode(b'', final=True)
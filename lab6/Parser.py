@@ -0,0 +1,282 @@
+import time
+from collections import deque
+
+from Lexer import TokenType
+
+# AST Node Classes
+class ASTNode:
+    __slots__ = ()
+
+class BinaryOpNode(ASTNode):
+    __slots__ = ('left', 'op', 'right')
+
+    def __init__(self, left, op, right):
+        self.left = left
+        self.op = op  # Token (operator type and value)
+        self.right = right
+
+    def __repr__(self):
+        return f"BinaryOpNode({self.left}, {self.op.value}, {self.right})"
+
+class NumNode(ASTNode):
+    __slots__ = ('token',)
+
+    def __init__(self, token):
+        self.token = token
+
+    @property
+    def value(self):
+        return self.token.value
+
+    def __repr__(self):
+        return f"NumNode({self.value})"
+
+class VarNode(ASTNode):
+    __slots__ = ('token',)
+
+    def __init__(self, token):
+        self.token = token
+
+    @property
+    def value(self):
+        return self.token.value
+
+    def __repr__(self):
+        return f"VarNode({self.value})"
+
+class IfNode(ASTNode):
+    __slots__ = ('condition', 'true_block', 'false_block')
+
+    def __init__(self, condition, true_block, false_block=None):
+        self.condition = condition
+        self.true_block = true_block
+        self.false_block = false_block
+
+    def __repr__(self):
+        return f"IfNode({self.condition}, {self.true_block}, {self.false_block})"
+
+class BlockNode(ASTNode):
+    __slots__ = ('statements',)
+
+    def __init__(self, statements):
+        self.statements = statements
+
+    def __repr__(self):
+        return f"BlockNode({self.statements})"
+
+class ReturnNode(ASTNode):
+    __slots__ = ('expression',)
+
+    def __init__(self, expression):
+        self.expression = expression
+
+    def __repr__(self):
+        return f"ReturnNode({self.expression})"
+
+def children(node):
+    if isinstance(node, BinaryOpNode):
+        return [node.left, node.right]
+    if isinstance(node, IfNode):
+        return [child for child in (node.condition, node.true_block, node.false_block) if child is not None]
+    if isinstance(node, ReturnNode):
+        return [node.expression]
+    if isinstance(node, BlockNode):
+        return list(node.statements)
+    return []
+
+class NodeFactory:
+    # How Parser builds nodes; an Arena offers the same names and returns rows.
+    num = NumNode
+    var = VarNode
+    binary = BinaryOpNode
+    conditional = IfNode
+    block = BlockNode
+    ret = ReturnNode
+
+# Parser Class
+class Parser:
+    # Tokens may be a list or any iterable, such as a stream_tokens generator; they
+    # are pulled one at a time and only peek() keeps more than the current one.
+    #
+    # `tracer(event, token, expected)` is called with 'eat' for every consumed
+    # token and 'error' on a mismatch; print_tracer gives the old debug output.
+    # A ParserProfile collects per-rule and per-token statistics. Both work by
+    # shadowing methods on the instance, so a plain Parser pays nothing for them.
+    # With an Arena, nodes are stored as its rows and the parser returns row ids.
+    def __init__(self, tokens, tracer=None, profile=None, arena=None):
+        self.tokens = tokens
+        self.stream = iter(tokens)
+        self.lookahead = deque()
+        self.current_token_index = 0
+        self.current_token = next(self.stream, None)
+        self.nodes = NodeFactory if arena is None else arena
+        self.tracer = tracer
+        if tracer is not None:
+            self.eat = self.traced_eat
+        if profile is not None:
+            profile.attach(self)
+
+    def error(self):
+        raise Exception("Invalid syntax")
+
+    def advance(self):
+        self.current_token_index += 1
+        if self.lookahead:
+            self.current_token = self.lookahead.popleft()
+        else:
+            self.current_token = next(self.stream, None)  # None once tokens run out
+
+    def peek(self, distance=1):
+        while len(self.lookahead) < distance:
+            token = next(self.stream, None)
+            if token is None:
+                return None
+            self.lookahead.append(token)
+        return self.lookahead[distance - 1]
+
+    def eat(self, token_type):
+        if self.current_token is not None and self.current_token.type == token_type:
+            self.advance()
+        else:
+            self.error()
+
+    def traced_eat(self, token_type):
+        if self.current_token is not None and self.current_token.type == token_type:
+            self.tracer('eat', self.current_token, token_type)
+            self.advance()
+        else:
+            self.tracer('error', self.current_token, token_type)
+            self.error()
+
+    def factor(self):
+        token = self.current_token
+        if token is None:
+            self.error()
+        elif token.type == TokenType.INTEGER or token.type == TokenType.FLOAT:
+            self.eat(token.type)
+            return self.nodes.num(token)
+        elif token.type == TokenType.IDENTIFIER:
+            self.eat(TokenType.IDENTIFIER)
+            return self.nodes.var(token)
+        else:
+            self.error()
+
+    def term(self):
+        node = self.factor()
+        while self.current_token and self.current_token.type == TokenType.OPERATOR and self.current_token.value in ('*', '/'):
+            token = self.current_token
+            self.eat(TokenType.OPERATOR)
+            node = self.nodes.binary(node, token, self.factor())
+        return node
+
+    def expr(self):
+        node = self.term()
+        while self.current_token and (
+                self.current_token.type == TokenType.OPERATOR and self.current_token.value in ('+', '-', '>', '<')):
+            token = self.current_token
+            self.eat(TokenType.OPERATOR)
+            node = self.nodes.binary(node, token, self.term())
+        return node
+
+    def statement(self):
+        if self.current_token is None:
+            self.error()
+        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value == 'return':
+            self.eat(TokenType.KEYWORD)
+            expr = self.expr()
+            self.eat(TokenType.SEMICOLON)
+            return self.nodes.ret(expr)
+        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value == 'if':
+            self.eat(TokenType.KEYWORD)
+            self.eat(TokenType.LPAREN)
+            condition = self.expr()  # Parse condition which might include operators like '>'
+            self.eat(TokenType.RPAREN)
+            if self.current_token and self.current_token.type == TokenType.KEYWORD and self.current_token.value == 'return':
+                true_block = self.statement()
+                false_block = None
+                if self.current_token and self.current_token.type == TokenType.KEYWORD and self.current_token.value == 'else':
+                    self.eat(TokenType.KEYWORD)
+                    false_block = self.statement()
+                return self.nodes.conditional(condition, true_block, false_block)
+            else:
+                self.error()  # Debug here to find what token is causing the issue
+        else:
+            self.error()
+
+    def parse(self):
+        ast = self.statement()
+        if self.current_token is None or self.current_token.type != TokenType.EOF:
+            self.error()
+        return ast
+
+    def statements(self):
+        # Parses a program of consecutive statements, yielding each one as soon as
+        # it is complete. Tokens that run out before an EOF token are an error.
+        while self.current_token is None or self.current_token.type != TokenType.EOF:
+            yield self.statement()
+
+    def parse_block_or_single_statement(self):
+        # Simple version: assuming next non-block statement is a single return statement.
+        return self.statement()
+
+
+def print_tracer(event, token, expected):
+    if event == 'eat':
+        print(f"Consuming: {token}")
+    else:
+        print(f"Error: Expected {expected}, but got {token}")
+
+
+class ParserProfile:
+    # Calls, inclusive and exclusive time per grammar rule, and per token type the
+    # number of tokens consumed and the parse time spent since the previous one.
+    RULES = ('statement', 'expr', 'term', 'factor')
+
+    def __init__(self):
+        self.rules = {name: [0, 0.0, 0.0] for name in self.RULES}
+        self.tokens = {}
+        self.children = [0.0]
+        self.last = None
+
+    def attach(self, parser):
+        for name in self.RULES:
+            setattr(parser, name, self.timed_rule(name, getattr(parser, name)))
+        eat = parser.eat
+
+        def counted_eat(token_type):
+            now = time.perf_counter()
+            stats = self.tokens.setdefault(token_type, [0, 0.0])
+            stats[0] += 1
+            if self.last is not None:
+                stats[1] += now - self.last
+            self.last = now
+            eat(token_type)
+
+        parser.eat = counted_eat
+
+    def timed_rule(self, name, method):
+        stats = self.rules[name]
+
+        def rule():
+            self.children.append(0.0)
+            start = time.perf_counter()
+            try:
+                return method()
+            finally:
+                elapsed = time.perf_counter() - start
+                children = self.children.pop()
+                self.children[-1] += elapsed
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += elapsed - children
+
+        return rule
+
+    def summary(self):
+        lines = [f'{"rule":<12} {"calls":>10} {"total s":>10} {"self s":>10}']
+        for name, (calls, total, own) in sorted(self.rules.items(), key=lambda item: -item[1][2]):
+            lines.append(f'{name:<12} {calls:>10} {total:>10.4f} {own:>10.4f}')
+        lines.append(f'{"token":<12} {"count":>10} {"time s":>10}')
+        for token_type, (count, spent) in sorted(self.tokens.items(), key=lambda item: -item[1][1]):
+            lines.append(f'{token_type.name:<12} {count:>10} {spent:>10.4f}')
+        return '\n'.join(lines)
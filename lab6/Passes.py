@@ -0,0 +1,133 @@
+import math
+import time
+
+from Evaluator import OPERATORS, unique_nodes
+from Lexer import Token, TokenType
+from Parser import BinaryOpNode, BlockNode, IfNode, NumNode, ReturnNode, VarNode, children
+
+
+class PassManager:
+    # Runs AST passes in order. A pass is any function that takes an AST and
+    # returns a new one; the input is never modified, since nodes may be shared.
+    def __init__(self, passes=None):
+        self.passes = list(DEFAULT_PASSES if passes is None else passes)
+        self.report = []
+
+    def run(self, ast):
+        self.report = []
+        for transform in self.passes:
+            before = count_nodes(ast)
+            start = time.perf_counter()
+            ast = transform(ast)
+            elapsed = time.perf_counter() - start
+            self.report.append({'pass': transform.__name__, 'before': before,
+                                'after': count_nodes(ast), 'seconds': elapsed})
+        return ast
+
+    def summary(self):
+        lines = [f'{"pass":<24} {"before":>8} {"after":>8} {"ms":>10}']
+        for entry in self.report:
+            lines.append(f'{entry["pass"]:<24} {entry["before"]:>8} {entry["after"]:>8} '
+                         f'{entry["seconds"] * 1000:>10.3f}')
+        return '\n'.join(lines)
+
+
+def count_nodes(ast):
+    # Distinct nodes, so that a shared subtree counts once.
+    return sum(1 for _ in unique_nodes(ast))
+
+
+def rebuild(node, transform, memo):
+    # Bottom-up copy of `node` with `transform` applied to every rebuilt node;
+    # memo maps id(original) to its result so that shared nodes stay shared.
+    # Children are rebuilt first from an explicit stack, so long operator chains
+    # do not run into the recursion limit.
+    if node is None:
+        return None
+    stack = [node]
+    while stack:
+        current = stack[-1]
+        if id(current) in memo:
+            stack.pop()
+            continue
+        waiting = [child for child in children(current) if id(child) not in memo]
+        if waiting:
+            stack += waiting
+            continue
+        stack.pop()
+        if isinstance(current, BinaryOpNode):
+            result = BinaryOpNode(memo[id(current.left)][1], current.op, memo[id(current.right)][1])
+        elif isinstance(current, IfNode):
+            false_block = memo[id(current.false_block)][1] if current.false_block is not None else None
+            result = IfNode(memo[id(current.condition)][1], memo[id(current.true_block)][1], false_block)
+        elif isinstance(current, ReturnNode):
+            result = ReturnNode(memo[id(current.expression)][1])
+        elif isinstance(current, BlockNode):
+            result = BlockNode([memo[id(statement)][1] for statement in current.statements])
+        else:
+            result = current
+        # The original is kept alive alongside its result so its id is not reused.
+        memo[id(current)] = (current, transform(result))
+    return memo[id(node)][1]
+
+
+def constant(value):
+    return NumNode(Token(TokenType.FLOAT if isinstance(value, float) else TokenType.INTEGER, value))
+
+
+def fold_constants(ast):
+    # Arithmetic and comparisons over numbers only; a comparison folds to 1 or 0.
+    # A division by zero is left in place so it still fails when evaluated, and
+    # so is an operation that overflows or gives inf or nan, which have no
+    # literal in the language.
+    def fold(node):
+        if isinstance(node, BinaryOpNode) and isinstance(node.left, NumNode) and isinstance(node.right, NumNode):
+            try:
+                value = OPERATORS[node.op.value](node.left.value, node.right.value)
+            except (ZeroDivisionError, OverflowError):
+                return node
+            if isinstance(value, float) and not math.isfinite(value):
+                return node
+            return constant(int(value) if isinstance(value, bool) else value)
+        return node
+
+    return rebuild(ast, fold, {})
+
+
+def eliminate_dead_branches(ast):
+    # An `if` on a constant becomes the branch it always takes; a missing `else`
+    # becomes an empty block, which returns nothing.
+    def prune(node):
+        if isinstance(node, IfNode) and isinstance(node.condition, NumNode):
+            if node.condition.value:
+                return node.true_block
+            return node.false_block if node.false_block is not None else BlockNode([])
+        return node
+
+    return rebuild(ast, prune, {})
+
+
+def share_subexpressions(ast):
+    # Hash-consing: structurally equal subtrees become one node object. Keys use
+    # the ids of already shared children, so each node is hashed in O(1).
+    table = {}
+
+    def intern(node):
+        if isinstance(node, NumNode):
+            key = ('num', type(node.value), node.value)
+        elif isinstance(node, VarNode):
+            key = ('var', node.value)
+        elif isinstance(node, BinaryOpNode):
+            key = ('binary', node.op.value, id(node.left), id(node.right))
+        elif isinstance(node, IfNode):
+            key = ('if', id(node.condition), id(node.true_block), id(node.false_block))
+        elif isinstance(node, ReturnNode):
+            key = ('return', id(node.expression))
+        else:
+            key = ('block', tuple(id(statement) for statement in node.statements))
+        return table.setdefault(key, node)
+
+    return rebuild(ast, intern, {})
+
+
+DEFAULT_PASSES = [fold_constants, eliminate_dead_branches, share_subexpressions]
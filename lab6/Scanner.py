@@ -0,0 +1,215 @@
+class ScanError(Exception):
+    pass
+
+
+class Scanner:
+    # Maximal-munch DFA built from an ordered token spec. Each rule is
+    # (kind, pattern); a pattern is a literal string or a list of (charset,
+    # quantifier) items, where a charset is a string of characters or a predicate
+    # such as str.isdigit and the quantifier is '', '?', '*' or '+'. The longest
+    # match wins and ties go to the earlier rule; rules of kind None are skipped.
+    #
+    # Characters are mapped to classes (which charsets they belong to) before
+    # scanning. Classes are found for Latin-1 up front and for other characters
+    # the first time they are seen, adding a column to the table. Class 0 marks
+    # the end of the text and leads every state to the dead one.
+    def __init__(self, spec):
+        self.kinds = []
+        self.rules = []
+        self.charsets = []
+        for kind, pattern in spec:
+            if isinstance(pattern, str):
+                pattern = [(char, '') for char in pattern]
+            items = []
+            for charset, quantifier in pattern:
+                if charset not in self.charsets:
+                    self.charsets.append(charset)
+                atom = self.charsets.index(charset)
+                if quantifier == '+':
+                    items += [(atom, ''), (atom, '*')]
+                elif quantifier in ('', '?', '*'):
+                    items.append((atom, quantifier))
+                else:
+                    raise ValueError(f'Unknown quantifier: {quantifier}')
+            self.kinds.append(kind)
+            self.rules.append(items)
+
+        # DFA state 0 is dead and state 1 the start; rows[state][class] is the next
+        # state and accept[state] the winning rule, or -1. `table` is the same
+        # table flattened, with states premultiplied by the row width.
+        self.signatures = [None]
+        self.class_of = ClassMap(self)
+        self.sets = [frozenset()]
+        self.state_of = {frozenset(): 0}
+        self.rows = [[0]]
+        self.accept = [-1]
+        self.table = None
+        self.start = self.state(self.closure((rule, 0) for rule in range(len(self.rules))))
+        for code in range(256):
+            self.class_of[code]
+
+    def matches(self, charset, char):
+        return char in charset if isinstance(charset, str) else charset(char)
+
+    def closure(self, positions):
+        closed = set()
+        stack = list(positions)
+        while stack:
+            rule, item = stack.pop()
+            if (rule, item) in closed:
+                continue
+            closed.add((rule, item))
+            items = self.rules[rule]
+            if item < len(items) and items[item][1] in ('?', '*'):
+                stack.append((rule, item + 1))
+        return frozenset(closed)
+
+    def move(self, positions, signature):
+        if signature is None:
+            return frozenset()
+        successors = []
+        for rule, item in positions:
+            items = self.rules[rule]
+            if item < len(items) and signature[items[item][0]]:
+                successors.append((rule, item) if items[item][1] == '*' else (rule, item + 1))
+        return self.closure(successors)
+
+    def state(self, positions):
+        if positions in self.state_of:
+            return self.state_of[positions]
+        state = len(self.sets)
+        self.state_of[positions] = state
+        self.sets.append(positions)
+        self.rows.append([])
+        done = [rule for rule, item in positions if item == len(self.rules[rule])]
+        self.accept.append(min(done) if done else -1)
+        # Fill the row for the classes known so far; states found on the way are
+        # filled by their own call.
+        for signature in self.signatures:
+            self.rows[state].append(self.state(self.move(positions, signature)))
+        self.table = None
+        return state
+
+    def add_class(self, signature):
+        code = len(self.signatures)
+        if code == 256:
+            raise ValueError('Too many character classes')
+        self.signatures.append(signature)
+        self.table = None
+        self.rows[0].append(0)
+        for state in range(1, len(self.sets)):
+            if len(self.rows[state]) == code:
+                self.rows[state].append(self.state(self.move(self.sets[state], signature)))
+        return code
+
+    def codes(self, text):
+        # One byte per character, its class code, and the end marker 0.
+        return text.translate(self.class_of).encode('latin-1') + b'\x00'
+
+    def flat(self):
+        if self.table is None:
+            width = len(self.signatures)
+            self.table = [target * width for row in self.rows for target in row]
+            self.flat_accept = [rule for rule in self.accept for _ in range(width)]
+        return self.table, self.flat_accept, self.start * len(self.signatures)
+
+    def match(self, codes, pos):
+        # Longest match starting at pos: (rule, end), or (-1, pos) if none.
+        rows, accept = self.rows, self.accept
+        state, rule, end = self.start, -1, pos
+        for i in range(pos, len(codes)):
+            state = rows[state][codes[i]]
+            if not state:
+                break
+            if accept[state] >= 0:
+                rule, end = accept[state], i + 1
+        return rule, end
+
+    def scan(self, text, pos=0, codes=None, final=True, base=0):
+        # Yields (rule, start, end) for every token that is not skipped; the kind is
+        # kinds[rule]. The inner loop runs to the dead state; only when the state it
+        # stopped in does not accept does match() back up to the last accepting one.
+        # Unless `final`, scanning stops at the first token that reaches the end of
+        # the text, since more text could extend it, and returns its start.
+        if codes is None:
+            codes = self.codes(text)
+        table, accept, start = self.flat()
+        kinds = self.kinds
+        size = len(codes) - 1
+        while pos < size:
+            state, i = start, pos
+            while True:
+                target = table[state + codes[i]]
+                if not target:
+                    break
+                state = target
+                i += 1
+            if i == size and not final:
+                return pos
+            rule = accept[state]
+            if rule < 0:
+                rule, i = self.match(codes, pos)
+                if rule < 0:
+                    raise ScanError(f'Invalid character: {text[pos]} at position {base + pos}')
+            if kinds[rule] is not None:
+                yield rule, pos, i
+            pos = i
+        return pos
+
+    def step(self, state, codes):
+        # DFA state reached from state over codes, up to the end marker; 0 once
+        # the DFA is dead.
+        rows = self.rows
+        for i in range(len(codes) - 1):
+            state = rows[state][codes[i]]
+            if not state:
+                break
+        return state
+
+    def scan_chunks(self, chunks):
+        # Yields (rule, lexeme, start) over an iterable of text chunks, with start
+        # offsets counted from the first chunk. Only the unfinished token at the
+        # end of a chunk is carried over: its pieces are kept in a list along with
+        # the DFA state they lead to, chunks that do not end it are only stepped
+        # through, and the pieces are joined once, when it ends.
+        pending, state, base = [], 0, 0
+        for chunk in chunks:
+            if pending:
+                state = self.step(state, self.codes(chunk))
+                pending.append(chunk)
+                if state:
+                    continue
+            else:
+                pending = [chunk]
+            text = ''.join(pending)
+            block = self.scan(text, 0, None, False, base)
+            while True:
+                try:
+                    rule, start, end = next(block)
+                except StopIteration as stop:
+                    pos = stop.value
+                    break
+                yield rule, text[start:end], base + start
+            pending = [text[pos:]] if pos < len(text) else []
+            state = self.step(self.start, self.codes(pending[0])) if pending else 0
+            base += pos
+        text = ''.join(pending)
+        for rule, start, end in self.scan(text, 0, None, True, base):
+            yield rule, text[start:end], base + start
+
+
+class ClassMap(dict):
+    # Code point -> class code character, for str.translate. Missing code points
+    # are classified on first use.
+    def __init__(self, scanner):
+        super().__init__()
+        self.scanner = scanner
+        self.code_of = {}
+
+    def __missing__(self, point):
+        char = chr(point)
+        signature = tuple(self.scanner.matches(charset, char) for charset in self.scanner.charsets)
+        if signature not in self.code_of:
+            self.code_of[signature] = self.scanner.add_class(signature)
+        self[point] = chr(self.code_of[signature])
+        return self[point]
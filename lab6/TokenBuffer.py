@@ -0,0 +1,181 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+from Lexer import RULE_TYPES, RULE_VALUES, SCANNER, TokenType
+from Scanner import ScanError
+
+# Rule code of the EOF token that ends every buffer.
+EOF_RULE = len(RULE_TYPES)
+BUFFER_TYPES = RULE_TYPES + [TokenType.EOF]
+BUFFER_VALUES = RULE_VALUES + [None]
+
+
+class TokenBuffer:
+    # Token stream stored as parallel arrays: the scanner rule of each token and
+    # its start and end offsets in the source. Lexemes are sliced and values
+    # converted only when asked for, and indexing returns a TokenView, so a
+    # buffer can be handed to Parser in place of a list of Tokens.
+    def __init__(self, text, pos=0):
+        self.text = text
+        self.rules, self.starts, self.ends = token_arrays(len(text))
+        rules, starts, ends = self.rules.append, self.starts.append, self.ends.append
+        for rule, start, end in SCANNER.scan(text, pos):
+            rules(rule)
+            starts(start)
+            ends(end)
+        rules(EOF_RULE)
+        starts(len(text))
+        ends(len(text))
+
+    @classmethod
+    def parallel(cls, text, processes=None, shard_size=1 << 22):
+        # The class codes of the source go to shared memory, split just after a
+        # ';', and the shards are scanned in a process pool. Each shard leaves its
+        # last token, which touches the split, to be matched here against the
+        # whole source: it must end exactly at the split for the shards to line up.
+        # Otherwise, or on an invalid character, the source is lexed sequentially.
+        processes = processes or os.cpu_count() or 1
+        codes = SCANNER.codes(text)
+        shard_size = max(1, min(shard_size, -(-len(text) // processes)))
+        bounds = shard_bounds(text, shard_size)
+        if processes == 1 or len(bounds) == 1:
+            shards = [scan_shard(codes, start, stop, len(text)) for start, stop in bounds]
+        else:
+            memory = SharedMemory(create=True, size=len(codes))
+            try:
+                memory.buf[:len(codes)] = codes
+                with ProcessPoolExecutor(processes) as pool:
+                    jobs = [(memory.name, start, stop, len(text)) for start, stop in bounds]
+                    shards = list(pool.map(scan_shard_worker, jobs))
+            finally:
+                memory.close()
+                memory.unlink()
+
+        buffer = cls.__new__(cls)
+        buffer.text = text
+        buffer.rules, buffer.starts, buffer.ends = token_arrays(len(text))
+        for (start, stop), shard in zip(bounds, shards):
+            if shard is None:
+                return cls(text)
+            rules, starts, ends, tail = shard
+            buffer.rules.extend(rules)
+            buffer.starts.extend(starts)
+            buffer.ends.extend(ends)
+            if tail < stop:
+                rule, end = SCANNER.match(codes, tail)
+                if rule < 0 or end != stop:
+                    return cls(text)
+                if SCANNER.kinds[rule] is not None:
+                    buffer.rules.append(rule)
+                    buffer.starts.append(tail)
+                    buffer.ends.append(end)
+        buffer.rules.append(EOF_RULE)
+        buffer.starts.append(len(text))
+        buffer.ends.append(len(text))
+        return buffer
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.rules)
+        if not 0 <= index < len(self.rules):
+            raise IndexError('token index out of range')
+        return TokenView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self.rules)):
+            yield TokenView(self, index)
+
+    def type(self, index):
+        return BUFFER_TYPES[self.rules[index]]
+
+    def lexeme(self, index):
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def value(self, index):
+        rule = self.rules[index]
+        if rule == EOF_RULE:
+            return None
+        convert = BUFFER_VALUES[rule]
+        lexeme = self.text[self.starts[index]:self.ends[index]]
+        return convert(lexeme) if convert else lexeme
+
+    def nbytes(self):
+        return sum(len(column) * column.itemsize for column in (self.rules, self.starts, self.ends))
+
+
+class TokenView:
+    # Token-compatible view of one buffer entry.
+    __slots__ = ('buffer', 'index')
+
+    def __init__(self, buffer, index):
+        self.buffer = buffer
+        self.index = index
+
+    @property
+    def type(self):
+        return self.buffer.type(self.index)
+
+    @property
+    def value(self):
+        return self.buffer.value(self.index)
+
+    @property
+    def start(self):
+        return self.buffer.starts[self.index]
+
+    @property
+    def end(self):
+        return self.buffer.ends[self.index]
+
+    def __repr__(self):
+        return f"Token({self.type}, {repr(self.value)})"
+
+
+def token_arrays(size):
+    offset = 'I' if size < 1 << 32 else 'Q'
+    return array('B'), array(offset), array(offset)
+
+
+def shard_bounds(text, shard_size):
+    bounds = []
+    start = 0
+    while start < len(text):
+        split = text.find(';', start + shard_size - 1) + 1
+        stop = split if split else len(text)
+        bounds.append((start, stop))
+        start = stop
+    return bounds or [(0, 0)]
+
+
+def scan_shard(codes, start, stop, size):
+    # Tokens of codes[start:stop] with absolute offsets, and the start of the last
+    # token, which is left out since the shard cut it off. None on an error.
+    shard = bytes(codes[start:stop]) + b'\x00'
+    rules, starts, ends = token_arrays(size)
+    tokens = SCANNER.scan(shard, 0, shard, final=False)
+    try:
+        while True:
+            rule, first, last = next(tokens)
+            rules.append(rule)
+            starts.append(start + first)
+            ends.append(start + last)
+    except StopIteration as done:
+        return rules, starts, ends, start + done.value
+    except ScanError:
+        return None
+
+
+def scan_shard_worker(job):
+    # Workers attach the shared codes for one shard and detach again, so no
+    # mapping outlives the job.
+    name, start, stop, size = job
+    memory = SharedMemory(name)
+    try:
+        return scan_shard(memory.buf, start, stop, size)
+    finally:
+        memory.close()
@@ -0,0 +1,231 @@
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from Arena import Arena
+from Document import Document
+from Evaluator import Evaluator
+from Lexer import Lexer, stream_tokens
+from Parser import BlockNode, Parser, ParserProfile, print_tracer
+from Passes import PassManager
+from TokenBuffer import TokenBuffer
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f'{label:<40} {time.perf_counter() - start:8.3f} s  -> {result}')
+    return result
+
+
+def random_source(statements, seed=0):
+    rng = random.Random(seed)
+    names = ['x', 'y', 'total', 'count2', 'value']
+
+    def operand():
+        return rng.choice((rng.choice(names), str(rng.randrange(1000)), f'{rng.random() * 100:.2f}'))
+
+    def expression():
+        parts = [operand()]
+        for _ in range(rng.randrange(3)):
+            parts += [rng.choice('+-*/'), operand()]
+        return ' '.join(parts)
+
+    lines = []
+    for _ in range(statements):
+        if rng.random() < 0.5:
+            lines.append(f'if ({expression()} {rng.choice("<>")} {operand()}) return {expression()};')
+        else:
+            lines.append(f'return {expression()};')
+    return '\n'.join(lines)
+
+
+def hand_written_lexer():
+    # The character-at-a-time lexer this one replaced, as still found in lab3.
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lab3', 'main.py')
+    spec = importlib.util.spec_from_file_location('lab3_lexer', path)
+    module = importlib.util.module_from_spec(spec)
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+    return module.Lexer
+
+
+def bench_lexer(statements=100_000):
+    text = random_source(statements)
+    print(f'Lexing {len(text) / 1e6:.1f} MB of source')
+    baseline = hand_written_lexer()
+    start = time.perf_counter()
+    expected = len(baseline(text).get_all_tokens())
+    elapsed = time.perf_counter() - start
+    print(f'{"hand-written lexer":<40} {elapsed:8.3f} s  -> {expected} tokens')
+    start = time.perf_counter()
+    count = len(Lexer(text).get_all_tokens())
+    table = time.perf_counter() - start
+    print(f'{"DFA lexer":<40} {table:8.3f} s  -> {count} tokens ({elapsed / table:.1f}x)')
+
+
+def traced(label, function, *args):
+    # Memory still allocated once function returns; timings are left out since
+    # tracemalloc slows every allocation down.
+    tracemalloc.start()
+    result = function(*args)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f'{label:<40} {memory / 1e6:8.1f} MB')
+    return result, memory
+
+
+def bench_token_buffer(statements=300_000):
+    text = random_source(statements)
+    print(f'Token storage for {len(text) / 1e6:.1f} MB of source')
+    tokens, listed = traced('list of Token', lambda: Lexer(text).get_all_tokens())
+    count = len(tokens)
+    del tokens
+    buffer, stored = traced('TokenBuffer', TokenBuffer, text)
+    print(f'{count:,} tokens: {listed / count:.1f} vs {stored / count:.1f} bytes per token '
+          f'({listed / stored:.1f}x less memory)')
+
+
+def bench_parallel_lexing(statements=300_000):
+    text = random_source(statements)
+    print(f'Parallel lexing of {len(text) / 1e6:.1f} MB of source')
+    start = time.perf_counter()
+    count = len(TokenBuffer(text))
+    print(f'{"TokenBuffer (sequential)":<40} {time.perf_counter() - start:8.3f} s  -> {count} tokens')
+    for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        count = len(TokenBuffer.parallel(text, processes))
+        label = f'TokenBuffer.parallel ({processes} processes)'
+        print(f'{label:<40} {time.perf_counter() - start:8.3f} s  -> {count} tokens')
+
+
+def peak(function, *args):
+    tracemalloc.start()
+    result = function(*args)
+    memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, memory
+
+
+def parse_whole(path):
+    with open(path) as file:
+        parser = Parser(Lexer(file.read()).get_all_tokens())
+    return sum(1 for _ in parser.statements())
+
+
+def parse_streamed(path):
+    with open(path, 'rb') as file:
+        return sum(1 for _ in Parser(stream_tokens(file)).statements())
+
+
+def bench_streaming(statements=50_000):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'source.txt')
+        with open(path, 'w') as file:
+            file.write(random_source(statements))
+        print(f'Parsing a {os.path.getsize(path) / 1e6:.1f} MB file')
+        for label, function in (('read, tokenize, then parse', parse_whole),
+                                ('stream_tokens into Parser', parse_streamed)):
+            count, memory = peak(function, path)
+            print(f'{label:<40} {memory / 1e6:8.1f} MB peak  -> {count} statements')
+
+
+def bench_parser_instrumentation(statements=50_000):
+    tokens = Lexer(random_source(statements)).get_all_tokens()
+    print(f'Parsing {len(tokens):,} tokens')
+
+    def parse(**options):
+        return sum(1 for _ in Parser(tokens, **options).statements())
+
+    timed('no instrumentation', parse)
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as null, contextlib.redirect_stdout(null):
+        count = parse(tracer=print_tracer)
+    print(f'{"print_tracer to /dev/null":<40} {time.perf_counter() - start:8.3f} s  -> {count}')
+    profile = ParserProfile()
+    timed('ParserProfile', lambda: parse(profile=profile))
+    print(profile.summary())
+
+
+def bench_arena(statements=200_000):
+    tokens = Lexer(random_source(statements)).get_all_tokens()
+    print(f'AST storage for {statements:,} statements')
+
+    def parse_objects():
+        return list(Parser(tokens).statements())
+
+    def parse_arena():
+        arena = Arena()
+        return arena, list(Parser(tokens, arena=arena).statements())
+
+    for label, function in (('slotted node objects', parse_objects), ('Arena', parse_arena)):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        result, memory = peak(function)
+        print(f'{label:<40} {elapsed:8.3f} s  {memory / 1e6:8.1f} MB')
+    arena, _ = result
+    print(f'{len(arena):,} nodes, {memory / len(arena):.1f} bytes per node in the arena')
+
+
+def bench_evaluation(records=1_000_000):
+    import numpy as np
+
+    ast = Parser(Lexer('if (x > 50) return x * 10;').get_all_tokens()).parse()
+    evaluator = Evaluator(ast)
+    column = np.random.default_rng(0).uniform(0, 100, records)
+    bindings = [{'x': x} for x in column.tolist()]
+    print(f'Evaluating {ast} over {records:,} records')
+    timed('closures', lambda: sum(value is not None for value in evaluator.evaluate_many(bindings)))
+    timed('compiled code', lambda: sum(evaluator.evaluate_code(record) is not None for record in bindings))
+    timed('NumPy batch', lambda: int(evaluator.evaluate_batch({'x': column})[1].sum()))
+
+
+def bench_passes(statements=500, records=200_000):
+    import numpy as np
+
+    ast = BlockNode(list(Parser(Lexer(random_source(statements)).get_all_tokens()).statements()))
+    manager = PassManager()
+    optimized = manager.run(ast)
+    print(f'AST passes over {statements} statements')
+    print(manager.summary())
+    rng = np.random.default_rng(0)
+    columns = {name: rng.uniform(1, 100, records) for name in ('x', 'y', 'total', 'count2', 'value')}
+    for label, tree in (('batch, as parsed', ast), ('batch, after passes', optimized)):
+        evaluator = Evaluator(tree)
+        timed(label, lambda: int(evaluator.evaluate_batch(columns)[1].sum()))
+
+
+def bench_incremental(statements=100_000, edits=1000):
+    text = random_source(statements)
+    print(f'Editing {len(text) / 1e6:.1f} MB of source')
+    timed('Lexer and Parser over the whole text', lambda: len(list(Parser(Lexer(text).get_all_tokens()).statements())))
+    start = time.perf_counter()
+    document = Document(text)
+    print(f'{"Document":<40} {time.perf_counter() - start:8.3f} s  -> {len(document)}')
+    rng = random.Random(0)
+    for label, near in (('Document.edit, nearby statements', True), ('Document.edit, anywhere', False)):
+        middle = document.locate(len(text) // 2)
+        start = time.perf_counter()
+        for _ in range(edits):
+            offset = document.start(middle + rng.randrange(-10, 10) if near else rng.randrange(len(document)))
+            document.edit(offset, offset, 'return x + 1;\n')
+            document.edit(offset, offset + 14, '')
+        print(f'{label:<40} {(time.perf_counter() - start) / (2 * edits) * 1e6:8.1f} us per edit')
+
+
+if __name__ == '__main__':
+    bench_lexer()
+    bench_token_buffer()
+    bench_parallel_lexing()
+    bench_streaming()
+    bench_parser_instrumentation()
+    bench_arena()
+    bench_evaluation()
+    bench_passes()
+    bench_incremental()
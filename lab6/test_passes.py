@@ -0,0 +1,56 @@
+import unittest
+import warnings
+
+from Evaluator import Evaluator
+from Lexer import Lexer
+from Parser import BinaryOpNode, BlockNode, NumNode, Parser
+from Passes import PassManager, fold_constants
+
+
+def parse(text):
+    return BlockNode(list(Parser(Lexer(text).get_all_tokens()).statements()))
+
+
+class TestPasses(unittest.TestCase):
+    def test_fold_keeps_non_finite(self):
+        ast = PassManager().run(parse('return ' + ' * '.join(['99999999999999999999.0'] * 20) + ';'))
+        self.assertIsInstance(ast.statements[0].expression, BinaryOpNode)
+        evaluator = Evaluator(ast)
+        self.assertEqual(evaluator.evaluate({}), float('inf'))
+        self.assertEqual(evaluator.evaluate_code({}), float('inf'))
+        literal = Evaluator(parse('return ' + '9' * 400 + '.0 - x;'))
+        self.assertEqual(literal.evaluate_code({'x': 1}), float('inf'))
+
+    def test_fold_comparisons(self):
+        folded = fold_constants(parse('return 3 > 2; return 3 < 2;'))
+        values = [statement.expression.value for statement in folded.statements]
+        self.assertEqual(values, [1, 0])
+        self.assertEqual([type(value) for value in values], [int, int])
+
+    def test_long_chains(self):
+        ast = parse('return ' + ' + '.join(['1'] * 2000) + ' + x;')
+        optimized = PassManager().run(ast)
+        self.assertEqual(Evaluator(optimized).evaluate({'x': 1}), 2001)
+        self.assertEqual(Evaluator(optimized).evaluate_code({'x': 1}), 2001)
+        self.assertIsInstance(optimized.statements[0].expression.left, NumNode)
+
+    def test_many_statements(self):
+        ast = parse(''.join(f'if (x > {i}) return {i};' for i in range(300, 0, -1)))
+        evaluator = Evaluator(PassManager().run(ast))
+        self.assertEqual(evaluator.evaluate_code({'x': 7}), 6)
+        self.assertIsNone(evaluator.evaluate_code({'x': 0}))
+
+    def test_batch_division_by_zero(self):
+        import numpy as np
+
+        evaluator = Evaluator(parse('if (x > 0) return 1 / x; return 0 / x;'))
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            values, returned = evaluator.evaluate_batch({'x': np.array([2.0, 0.0])})
+        self.assertEqual(values[0], 0.5)
+        self.assertTrue(np.isnan(values[1]))
+        self.assertTrue(returned.all())
+
+
+if __name__ == '__main__':
+    unittest.main()